@@ -1,44 +1,144 @@
+import argparse
+
 import pandas as pd
 
-def compute_hit_percentages(filepath: str) -> pd.DataFrame:
+SUB_CATEGORIES = ['Gold', 'Silver', 'Bronse']
+HIT_COLUMNS = ['empName', 'Category', 'Sub_Category', 'Hit']
+
+# Grouping modes: per employee (Category taken from the employee's first row),
+# or per employee and Category
+GROUPINGS = {
+    'empName': ['empName'],
+    'empName_category': ['empName', 'Category'],
+}
+
+
+def _read_hits(filepath, chunksize=None):
+    """Read only the hit columns, with the text columns as categoricals."""
+    return pd.read_csv(
+        filepath,
+        usecols=HIT_COLUMNS,
+        dtype={'empName': 'category', 'Category': 'category', 'Sub_Category': 'category'},
+        chunksize=chunksize,
+    )
+
+
+def hit_shares(df, by=('empName',)):
     """
-    Computes the percentage of hits for each Sub_Category per empName
-    (ignoring Category in grouping) and returns a DataFrame.
+    Sum hits per group and Sub_Category in one groupby and turn them into shares.
+
+    Parameters:
+        df (pd.DataFrame): Hit records (or partial sums) with the `by` columns,
+            Sub_Category and Hit.
+        by (sequence of str): Grouping columns.
+
+    Returns:
+        pd.DataFrame: Indexed by `by`, one float column per Sub_Category in
+        SUB_CATEGORIES holding its percentage of the group's total hits
+        (0 for missing sub-categories or groups without hits).
+    """
+    by = list(by)
+    sums = df.groupby(by + ['Sub_Category'], observed=True, sort=True)['Hit'].sum()
+    table = sums.unstack('Sub_Category', fill_value=0)
+
+    # Shares are of all hits, including sub-categories that are not reported
+    totals = table.sum(axis=1)
+    table = table.reindex(columns=SUB_CATEGORIES, fill_value=0)
+    shares = table.div(totals.where(totals != 0), axis=0).mul(100).fillna(0.0)
+    shares.columns.name = None
+    return shares
+
+
+def aggregate_hits(filepath, mode='empName', chunksize=None):
+    """
+    Compute numeric Sub_Category percentages per group from a hits CSV file.
+
+    With chunksize the file is read in chunks: each chunk is reduced to hit sums
+    per group and Sub_Category, and the shares are computed from the combined
+    sums, so memory is bounded by the number of groups rather than records.
 
     Parameters:
         filepath (str): Path to the input CSV file.
+        mode (str): A key of GROUPINGS.
+        chunksize (int, optional): Rows per chunk.
 
     Returns:
-        pd.DataFrame: empName, Category, and Sub_Category percentages.
+        pd.DataFrame: The grouping columns, Category, and one float percentage
+        column per Sub_Category.
     """
-    df = pd.read_csv(filepath)
+    if mode not in GROUPINGS:
+        raise ValueError(f"Unknown grouping mode '{mode}', expected one of {list(GROUPINGS)}")
+    by = GROUPINGS[mode]
 
-    # Sum Hit for each empName and Sub_Category
-    sub_totals = df.groupby(['empName', 'Sub_Category'], as_index=False)['Hit'].sum()
+    if chunksize is None:
+        hits = _read_hits(filepath)
+        result = hit_shares(hits, by)
+        if 'Category' not in by:
+            categories = hits.groupby('empName', observed=True, sort=False)['Category'].first()
+    else:
+        partial_sums = []
+        first_categories = []
+        for chunk in _read_hits(filepath, chunksize):
+            sums = chunk.groupby(by + ['Sub_Category'], observed=True)['Hit'].sum()
+            partial_sums.append(sums.reset_index())
+            if 'Category' not in by:
+                first_categories.append(
+                    chunk.groupby('empName', observed=True, sort=False)['Category'].first()
+                )
+        # Partial sums are small; plain strings so keys from different chunks line up
+        sums = pd.concat(partial_sums, ignore_index=True).astype(
+            {col: str for col in by + ['Sub_Category']}
+        )
+        result = hit_shares(sums, by)
+        if 'Category' not in by:
+            categories = (
+                pd.concat([c.astype(object) for c in first_categories])
+                .groupby(level=0, sort=False)
+                .first()
+            )
 
-    # Total Hit per empName
-    total_hits = sub_totals.groupby('empName')['Hit'].sum().reset_index(name='TotalHit')
+    # Categorical groups come out in category order; sort by value instead
+    result = result.reset_index().astype({col: str for col in by})
+    result = result.sort_values(by, ignore_index=True)
+    if 'Category' not in by:
+        # Category of each employee's first record
+        result.insert(1, 'Category', result['empName'].map(categories.astype(object)))
+    return result
 
-    # Merge totals to compute percentage
-    merged = pd.merge(sub_totals, total_hits, on='empName')
-    merged['Percentage'] = (merged['Hit'] / merged['TotalHit'] * 100).round(0).astype(int).astype(str) + '%'
 
-    # Get one Category per empName (if needed, use first occurrence)
-    categories = df.groupby('empName')['Category'].first().reset_index()
+def format_percentages(result):
+    """Format the Sub_Category percentages as rounded '<n>%' strings for export."""
+    formatted = result.copy()
+    for col in SUB_CATEGORIES:
+        formatted[col] = formatted[col].round(0).astype(int).astype(str) + '%'
+    return formatted
+
+
+def compute_hit_percentages(filepath: str, chunksize=None) -> pd.DataFrame:
+    """
+    Computes the percentage of hits for each Sub_Category per empName
+    (ignoring Category in grouping) and returns a DataFrame.
 
-    # Pivot to Sub_Category as columns
-    pivot = merged.pivot(index='empName', columns='Sub_Category', values='Percentage').reset_index()
+    Parameters:
+        filepath (str): Path to the input CSV file.
+        chunksize (int, optional): Read the file in chunks of this many rows.
 
-    # Merge Category back
-    pivot = pd.merge(pivot, categories, on='empName')
+    Returns:
+        pd.DataFrame: empName, Category, and Sub_Category percentages.
+    """
+    return format_percentages(aggregate_hits(filepath, 'empName', chunksize))
 
-    # Fill missing sub-categories with '0%'
-    for col in ['Gold', 'Silver', 'Bronse']:
-        if col not in pivot.columns:
-            pivot[col] = '0%'
-    pivot = pivot.fillna('0%')
 
-    # Rearrange columns
-    final_df = pivot[['empName', 'Category', 'Gold', 'Silver', 'Bronse']]
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compute Sub_Category hit percentages')
+    parser.add_argument('input_file')
+    parser.add_argument('--by', choices=list(GROUPINGS), default='empName')
+    parser.add_argument('--chunksize', type=int, default=None)
+    parser.add_argument('--output', help='Write the result to this CSV file')
+    args = parser.parse_args()
 
-    return final_df
+    result_df = format_percentages(aggregate_hits(args.input_file, args.by, args.chunksize))
+    if args.output:
+        result_df.to_csv(args.output, index=False)
+    else:
+        print(result_df.to_string(index=False))
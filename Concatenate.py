@@ -1,6 +1,188 @@
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 
-def merge_files_with_selected_columns(file_a_path, file_b_path, output_path='merged_output.csv', 
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def expand_input_paths(patterns, exclude=None):
+    """
+    Expand glob patterns into input paths, keeping the order the patterns are given in.
+
+    Each pattern's matches are sorted (daily extracts named by date come out in
+    date order), leaving out the exclude path (e.g. the output of a previous run).
+    Paths without glob characters are kept as they are.
+    """
+    exclude = os.path.abspath(exclude) if exclude else None
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(
+                path for path in glob.glob(pattern) if os.path.abspath(path) != exclude
+            )
+            if not matches:
+                print(f"No files match {pattern}")
+            paths.extend(matches)
+        else:
+            paths.append(pattern)
+    return paths
+
+
+def read_header(path):
+    """Return the column names of a CSV file without reading its rows."""
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def aligned_columns(headers, allowed_extra_columns=None):
+    """
+    Output columns for files with the given headers.
+
+    The columns common to every file, in the first file's order, followed by the
+    allowed extra columns that appear in at least one file.
+    """
+    common = set(headers[0]).intersection(*headers[1:])
+    ordered_common = [col for col in headers[0] if col in common]
+    present = set().union(*headers)
+    extra = [
+        col
+        for col in dict.fromkeys(allowed_extra_columns or [])
+        if col in present and col not in common
+    ]
+    return ordered_common + extra
+
+
+def read_aligned(path, columns, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Read a CSV file in chunks with its columns reordered to columns.
+
+    Values are kept as text, so they are written back exactly as read, and
+    columns the file does not have are filled with empty (null) values.
+    """
+    usecols = set(columns)
+    reader = pd.read_csv(
+        path,
+        usecols=lambda col: col in usecols,
+        dtype=str,
+        keep_default_na=False,
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        yield chunk.reindex(columns=columns, fill_value='')
+
+
+def _write_aligned_part(path, columns, chunksize, part_path):
+    """Worker: write the aligned rows of one input (no header) to part_path."""
+    rows = 0
+    with open(part_path, 'w', newline='', encoding='utf-8') as out:
+        for chunk in read_aligned(path, columns, chunksize):
+            chunk.to_csv(out, index=False, header=False)
+            rows += len(chunk)
+    return rows
+
+
+def _write_parallel(out, paths, columns, chunksize, workers, max_in_flight, work_dir):
+    """
+    Parse inputs in a process pool and append them to out in input order.
+
+    Each worker writes one aligned input to a part file; the parent copies the
+    parts to out in order and deletes them. At most max_in_flight inputs are
+    submitted ahead of the one being written, which caps the part files on disk
+    (memory per worker is one chunk).
+    """
+    total_rows = 0
+    pending = deque()
+    queued = iter(enumerate(paths))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            # Keep up to max_in_flight inputs submitted ahead of the writer
+            for i, path in queued:
+                part_path = os.path.join(work_dir, f'part-{i:06d}.csv')
+                future = pool.submit(_write_aligned_part, path, columns, chunksize, part_path)
+                pending.append((future, part_path))
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                break
+
+            future, part_path = pending.popleft()
+            total_rows += future.result()
+            with open(part_path, 'r', newline='', encoding='utf-8') as part:
+                shutil.copyfileobj(part, out)
+            os.remove(part_path)
+    return total_rows
+
+
+def concatenate_files(input_paths, output_path='merged_output.csv',
+                      allowed_extra_columns=None, chunksize=DEFAULT_CHUNKSIZE,
+                      workers=None, max_in_flight=None):
+    """
+    Concatenate any number of CSV files on their common columns in one streaming pass.
+
+    The output schema is worked out from the headers alone (see aligned_columns),
+    then every file is streamed chunk by chunk into the output, so memory is
+    bounded by one chunk however many files there are. The output is written to
+    a temporary file and only replaces output_path once it is complete.
+
+    Parameters:
+        input_paths (list of str): CSV files or glob patterns, in output order.
+        output_path (str): Path to save the merged file.
+        allowed_extra_columns (list of str): Extra columns to keep even though not
+            every file has them (e.g., ['code']); missing values are left empty.
+        chunksize (int): Rows read per chunk.
+        workers (int, optional): Parse the files in this many processes while
+            a single writer appends them in input order.
+        max_in_flight (int, optional): With workers, how many files may be
+            parsed ahead of the writer (default: 2 x workers).
+
+    Returns:
+        int: Number of rows written.
+    """
+    paths = expand_input_paths(input_paths, exclude=output_path)
+    if not paths:
+        raise ValueError('No input files to concatenate')
+
+    headers = [read_header(path) for path in paths]
+    columns = aligned_columns(headers, allowed_extra_columns)
+
+    total_rows = 0
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(suffix='.csv', dir=output_dir)
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as out:
+            pd.DataFrame(columns=columns).to_csv(out, index=False)
+            if workers is not None and workers > 1:
+                work_dir = tempfile.mkdtemp(prefix='concat_', dir=output_dir)
+                try:
+                    total_rows = _write_parallel(
+                        out, paths, columns, chunksize, workers,
+                        max_in_flight or 2 * workers, work_dir,
+                    )
+                finally:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+            else:
+                for path in paths:
+                    for chunk in read_aligned(path, columns, chunksize):
+                        chunk.to_csv(out, index=False, header=False)
+                        total_rows += len(chunk)
+        if os.path.exists(output_path):
+            shutil.copymode(output_path, tmp_path)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    print(f"Merged {len(paths)} files ({total_rows} rows) saved as: {output_path}")
+    return total_rows
+
+
+def merge_files_with_selected_columns(file_a_path, file_b_path, output_path='merged_output.csv',
                                       allowed_extra_columns=None):
     """
     Merge two CSV files based on common columns and optionally include only selected extra columns from file B.
@@ -11,32 +193,44 @@ def merge_files_with_selected_columns(file_a_path, file_b_path, output_path='mer
         output_path (str): Path to save the merged file.
         allowed_extra_columns (list of str): Extra columns from file B to keep (e.g., ['code']).
     """
-    df_a = pd.read_csv(file_a_path)
-    df_b = pd.read_csv(file_b_path)
+    if allowed_extra_columns:
+        # Keep only if they actually exist in file B
+        columns_b = set(read_header(file_b_path))
+        allowed_extra_columns = [col for col in allowed_extra_columns if col in columns_b]
+    concatenate_files([file_a_path, file_b_path], output_path, allowed_extra_columns)
 
-    # Common columns
-    common_cols = list(set(df_a.columns) & set(df_b.columns))
 
-    # Keep only selected extra columns from B
-    if allowed_extra_columns:
-        # Keep only if they actually exist in df_b
-        allowed_extra_columns = [col for col in allowed_extra_columns if col in df_b.columns]
-    else:
-        allowed_extra_columns = []
-
-    # Final column order: common columns (from df_a's order) + allowed extra columns
-    ordered_common = [col for col in df_a.columns if col in common_cols]
-    final_columns = ordered_common + allowed_extra_columns
-
-    # Add missing allowed columns to df_a
-    for col in allowed_extra_columns:
-        df_a[col] = pd.NA
-
-    # Subset both dataframes
-    df_a = df_a[final_columns]
-    df_b = df_b[final_columns]
-
-    # Concatenate and save
-    merged_df = pd.concat([df_a, df_b], ignore_index=True)
-    merged_df.to_csv(output_path, index=False)
-    print(f"Merged file saved as: {output_path}")
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Concatenate CSV files on their common columns'
+    )
+    parser.add_argument('inputs', nargs='+', help='CSV files or glob patterns')
+    parser.add_argument('--output', default='merged_output.csv')
+    parser.add_argument(
+        '--extra-columns',
+        metavar='COL[,COL...]',
+        help='Columns to keep even though not every file has them',
+    )
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Parse the inputs in N processes (output keeps the input order)',
+    )
+    parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        default=None,
+        help='Files parsed ahead of the writer in --workers mode (default: 2 x workers)',
+    )
+    args = parser.parse_args()
+
+    concatenate_files(
+        args.inputs,
+        args.output,
+        args.extra_columns.split(',') if args.extra_columns else None,
+        args.chunksize,
+        workers=args.workers,
+        max_in_flight=args.max_in_flight,
+    )
@@ -1,15 +1,406 @@
-import pandas as pd
+import argparse
 import os
+from collections import OrderedDict
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 200_000
+DEFAULT_MAX_OPEN_FILES = 256
+DEFAULT_BUFFER_MB = 64
+DEFAULT_ROW_GROUP_SIZE = 128_000
+DEFAULT_BUFFER_ROWS = 1_000_000
+DEFAULT_COMPRESSION = "snappy"
+# Directory name Hive (and pyarrow) use for a missing partition value
+HIVE_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def safe_file_name(name):
+    """Sanitize a key value for file system safety."""
+    return str(name).strip().replace(" ", "_").replace("/", "_")
+
+
+def _render_lines(df):
+    """
+    Render each row of an all-text DataFrame as one CSV line (without newline).
+
+    Fields are quoted like to_csv's default QUOTE_MINIMAL: only when they
+    contain the separator, a quote or a line break.
+    """
+    fields = []
+    for col in df.columns:
+        values = df[col]
+        needs_quotes = values.str.contains(r'[",\r\n]', regex=True)
+        if len(df.columns) == 1:
+            # A lone empty field must be quoted or the row reads back as blank
+            needs_quotes |= values == ""
+        if needs_quotes.any():
+            quoted = '"' + values.str.replace('"', '""', regex=False) + '"'
+            values = values.where(~needs_quotes, quoted)
+        fields.append(values)
+    if len(fields) == 1:
+        return fields[0]
+    return fields[0].str.cat(fields[1:], sep=",")
+
+
+def _render_header(columns):
+    """Render the header line (with newline) for the given columns."""
+    names = [str(col) for col in columns]
+    return _render_lines(pd.DataFrame([names], columns=names)).iloc[0] + "\n"
+
+
+class _WriterPool:
+    """
+    Append text to one CSV file per key with a bounded number of open files.
+
+    Text is buffered per key and written when the buffers pass buffer_bytes in
+    total. At most max_open files are kept open; the least recently used one is
+    closed when another is needed. A key's file is created (and its header
+    written) on first use and appended to afterwards.
+    """
+
+    def __init__(self, output_dir, header, max_open, buffer_bytes):
+        self.output_dir = output_dir
+        self.header = header
+        self.max_open = max_open
+        self.buffer_bytes = buffer_bytes
+        self._open = OrderedDict()
+        self._created = set()
+        self._pending = {}
+        self._pending_bytes = 0
+
+    def write(self, file_name, text):
+        self._pending.setdefault(file_name, []).append(text)
+        self._pending_bytes += len(text)
+        if self._pending_bytes >= self.buffer_bytes:
+            self.flush()
+
+    def _handle(self, file_name):
+        handle = self._open.pop(file_name, None)
+        if handle is None:
+            if len(self._open) >= self.max_open:
+                _, oldest = self._open.popitem(last=False)
+                oldest.close()
+            path = os.path.join(self.output_dir, f"{file_name}.csv")
+            if file_name in self._created:
+                handle = open(path, "a", newline="", encoding="utf-8")
+            else:
+                handle = open(path, "w", newline="", encoding="utf-8")
+                handle.write(self.header)
+                self._created.add(file_name)
+        self._open[file_name] = handle
+        return handle
+
+    def flush(self):
+        for file_name, texts in self._pending.items():
+            self._handle(file_name).write("".join(texts))
+        self._pending = {}
+        self._pending_bytes = 0
+
+    def close(self):
+        self.flush()
+        for handle in self._open.values():
+            handle.close()
+        self._open.clear()
+
+    @property
+    def files_written(self):
+        return len(self._created)
+
+
+def _route_chunk(pool, chunk, column):
+    """Group the rows of chunk by key and queue each group's CSV text."""
+    lines = _render_lines(chunk).to_numpy()
+    names = chunk[column].map(safe_file_name)
+    codes, uniques = pd.factorize(names)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))
+    lines = lines[order]
+
+    start = 0
+    for file_name, end in zip(uniques, bounds):
+        pool.write(file_name, "\n".join(lines[start:end]) + "\n")
+        start = end
+
+
+def split_csv(
+    input_file,
+    column="Name",
+    output_dir="split_by_name",
+    chunksize=DEFAULT_CHUNKSIZE,
+    max_open_files=DEFAULT_MAX_OPEN_FILES,
+    buffer_mb=DEFAULT_BUFFER_MB,
+):
+    """
+    Split a CSV file into one CSV per value of column in a single streaming pass.
+
+    The input is read in chunks with every value kept as text, so fields are
+    written out exactly as read. Memory is bounded by one chunk plus the write
+    buffers; open file descriptors by max_open_files.
+
+    Args:
+        input_file (str): Path to the CSV file to split
+        column (str): Column to split on
+        output_dir (str): Directory for the output files (<value>.csv)
+        chunksize (int): Rows read per chunk
+        max_open_files (int): Maximum number of output files kept open
+        buffer_mb (int): Buffered output (MiB) before it is written out
+
+    Returns:
+        dict: Number of rows read and files written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    reader = pd.read_csv(
+        input_file, chunksize=chunksize, dtype=str, keep_default_na=False
+    )
+
+    pool = None
+    total_rows = 0
+    try:
+        for chunk in reader:
+            if pool is None:
+                if column not in chunk.columns:
+                    raise ValueError(f"Column '{column}' not found in {input_file}")
+                pool = _WriterPool(
+                    output_dir,
+                    _render_header(chunk.columns),
+                    max_open_files,
+                    buffer_mb * 1024 * 1024,
+                )
+            _route_chunk(pool, chunk, column)
+            total_rows += len(chunk)
+    finally:
+        if pool is not None:
+            pool.close()
+
+    files = pool.files_written if pool is not None else 0
+    print(f"Split {total_rows} rows of {input_file} into {files} files in {output_dir}")
+    return {"rows": total_rows, "files": files}
+
+
+def partition_dir(columns, values):
+    """Hive-style relative directory (col=value/...) for one partition."""
+    return os.path.join(
+        *(
+            f"{col}={quote(str(value), safe=' ') if value != '' else HIVE_NULL_PARTITION}"
+            for col, value in zip(columns, values)
+        )
+    )
+
+
+class _ParquetWriterPool:
+    """
+    Write DataFrames to one Parquet file per partition directory.
+
+    Rows are buffered per partition and written as a row group once a partition
+    has row_group_size rows, or for every partition once buffer_rows rows are
+    buffered in total. At most max_open ParquetWriters are kept open; when an
+    evicted partition gets more rows, they go to its next part-N.parquet file.
+    """
+
+    def __init__(self, output_dir, schema, max_open, row_group_size, buffer_rows, compression):
+        self.output_dir = output_dir
+        self.schema = schema
+        self.max_open = max_open
+        self.row_group_size = row_group_size
+        self.buffer_rows = buffer_rows
+        self.compression = compression
+        self._open = OrderedDict()
+        self._parts = {}
+        self._pending = {}
+        self._pending_rows = {}
+        self._total_pending = 0
+
+    def write(self, partition, df):
+        self._pending.setdefault(partition, []).append(df)
+        self._pending_rows[partition] = self._pending_rows.get(partition, 0) + len(df)
+        self._total_pending += len(df)
+        if self._pending_rows[partition] >= self.row_group_size:
+            self._write_partition(partition)
+        if self._total_pending >= self.buffer_rows:
+            self.flush()
+
+    def _writer(self, partition):
+        import pyarrow.parquet as pq
+
+        writer = self._open.pop(partition, None)
+        if writer is None:
+            if len(self._open) >= self.max_open:
+                _, oldest = self._open.popitem(last=False)
+                oldest.close()
+            part = self._parts.get(partition, -1) + 1
+            self._parts[partition] = part
+            directory = os.path.join(self.output_dir, partition)
+            os.makedirs(directory, exist_ok=True)
+            writer = pq.ParquetWriter(
+                os.path.join(directory, f"part-{part}.parquet"),
+                self.schema,
+                compression=self.compression,
+            )
+        self._open[partition] = writer
+        return writer
+
+    def _write_partition(self, partition):
+        import pyarrow as pa
+
+        frames = self._pending.pop(partition)
+        self._total_pending -= self._pending_rows.pop(partition)
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        self._writer(partition).write_table(table, row_group_size=self.row_group_size)
+
+    def flush(self):
+        for partition in list(self._pending):
+            self._write_partition(partition)
+
+    def close(self):
+        self.flush()
+        for writer in self._open.values():
+            writer.close()
+        self._open.clear()
+
+    @property
+    def partitions_written(self):
+        return len(self._parts)
+
+
+def split_parquet(
+    input_file,
+    partition_by=("Name",),
+    output_dir="split_by_name",
+    chunksize=DEFAULT_CHUNKSIZE,
+    max_open_files=DEFAULT_MAX_OPEN_FILES,
+    row_group_size=DEFAULT_ROW_GROUP_SIZE,
+    compression=DEFAULT_COMPRESSION,
+    buffer_rows=DEFAULT_BUFFER_ROWS,
+):
+    """
+    Split a CSV file into a Hive-partitioned Parquet dataset in one streaming pass.
+
+    Rows go to output_dir/<col>=<value>/.../part-N.parquet, one directory level
+    per partition column; the partition columns are encoded in the path only,
+    as Hive-partitioned readers (pyarrow.dataset, Spark, DuckDB) expect. Values
+    are kept as text, so every file has the same all-string schema. Needs
+    pyarrow. Write into an empty output_dir: existing part files are not removed.
+
+    Args:
+        input_file (str): Path to the CSV file to split
+        partition_by (sequence of str): Columns to partition on, outermost first
+        output_dir (str): Root directory of the dataset
+        chunksize (int): Rows read per chunk
+        max_open_files (int): Maximum number of Parquet writers kept open
+        row_group_size (int): Maximum rows per row group
+        compression (str): Parquet codec ("snappy", "zstd", "gzip", "none", ...)
+        buffer_rows (int): Rows buffered across partitions before they are written
+
+    Returns:
+        dict: Number of rows read and partitions written
+    """
+    import pyarrow as pa
+
+    partition_by = list(partition_by)
+    os.makedirs(output_dir, exist_ok=True)
+    reader = pd.read_csv(
+        input_file, chunksize=chunksize, dtype=str, keep_default_na=False
+    )
+
+    pool = None
+    total_rows = 0
+    try:
+        for chunk in reader:
+            if pool is None:
+                missing = [col for col in partition_by if col not in chunk.columns]
+                if missing:
+                    raise ValueError(f"Columns {missing} not found in {input_file}")
+                data_columns = [col for col in chunk.columns if col not in partition_by]
+                schema = pa.schema([(col, pa.string()) for col in data_columns])
+                pool = _ParquetWriterPool(
+                    output_dir, schema, max_open_files, row_group_size, buffer_rows, compression
+                )
+            for values, group in chunk.groupby(partition_by, sort=False):
+                pool.write(partition_dir(partition_by, values), group[data_columns])
+            total_rows += len(chunk)
+    finally:
+        if pool is not None:
+            pool.close()
+
+    partitions = pool.partitions_written if pool is not None else 0
+    print(
+        f"Split {total_rows} rows of {input_file} into {partitions} partitions "
+        f"in {output_dir}"
+    )
+    return {"rows": total_rows, "partitions": partitions}
+
+
+def split_dataframe(df, column="Name", output_dir="split_by_name"):
+    """Write one CSV per value of column of an in-memory DataFrame."""
+    os.makedirs(output_dir, exist_ok=True)
+    text = df.astype(str).where(df.notna(), "")
+    pool = _WriterPool(
+        output_dir,
+        _render_header(df.columns),
+        DEFAULT_MAX_OPEN_FILES,
+        DEFAULT_BUFFER_MB * 1024 * 1024,
+    )
+    try:
+        _route_chunk(pool, text, column)
+    finally:
+        pool.close()
+    return {"rows": len(df), "files": pool.files_written}
 
-# Assuming 'df' is your DataFrame and 'Name' is the column to split on
 
-# Create a directory to store the output files (optional)
-output_dir = "split_by_name"
-os.makedirs(output_dir, exist_ok=True)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Split a CSV file into one file per value of a column"
+    )
+    parser.add_argument("input_file")
+    parser.add_argument("--column", default="Name", help="Column to split on")
+    parser.add_argument(
+        "--format",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="One CSV per value, or a Hive-partitioned Parquet dataset",
+    )
+    parser.add_argument(
+        "--partition-by",
+        metavar="COL[,COL...]",
+        help="Parquet partition columns, outermost first (default: --column)",
+    )
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    parser.add_argument("--compression", default=DEFAULT_COMPRESSION)
+    parser.add_argument("--output-dir", default="split_by_name")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument(
+        "--max-open-files",
+        type=int,
+        default=DEFAULT_MAX_OPEN_FILES,
+        help="Maximum number of output files kept open at once",
+    )
+    parser.add_argument(
+        "--buffer-mb",
+        type=int,
+        default=DEFAULT_BUFFER_MB,
+        help="Output buffered in memory before it is written out",
+    )
+    args = parser.parse_args()
 
-# Group by 'Name' and save each group
-for name, group in df.groupby('Name'):
-    # Sanitize the name for file system safety
-    safe_name = str(name).strip().replace(" ", "_").replace("/", "_")
-    file_path = os.path.join(output_dir, f"{safe_name}.csv")
-    group.to_csv(file_path, index=False)
+    if args.format == "parquet":
+        split_parquet(
+            args.input_file,
+            partition_by=(args.partition_by or args.column).split(","),
+            output_dir=args.output_dir,
+            chunksize=args.chunksize,
+            max_open_files=args.max_open_files,
+            row_group_size=args.row_group_size,
+            compression=args.compression,
+        )
+    else:
+        split_csv(
+            args.input_file,
+            column=args.column,
+            output_dir=args.output_dir,
+            chunksize=args.chunksize,
+            max_open_files=args.max_open_files,
+            buffer_mb=args.buffer_mb,
+        )
@@ -0,0 +1,546 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+MG_DIR = os.path.join(ROOT_DIR, "mg")
+
+SIZES = {"10k": 10_000, "1M": 1_000_000, "10M": 10_000_000}
+GENERATE_CHUNK_ROWS = 500_000
+
+REPORTS = np.array(["norm", "crit", "mist", "warn"])
+CATEGORIES = np.array(["Hardware", "Network", "Software", "Security", "Service"])
+SUB_CATEGORIES = np.array(["Gold", "Silver", "Bronse"])
+N_CODES = 1000
+
+
+def _random_words(rng, n, length):
+    """n random upper-case words of the given length."""
+    letters = rng.integers(65, 91, size=(n, length), dtype=np.uint8)
+    return letters.view(f"S{length}").ravel().astype(str)
+
+
+def _codes(n_codes=N_CODES):
+    """Deterministic pool of 3-letter codes, like the 'ABC' prefixes in test_large.csv."""
+    rng = np.random.default_rng(12345)
+    return np.unique(_random_words(rng, n_codes * 2, 3))[:n_codes]
+
+
+def _write_in_chunks(path, n_rows, make_chunk, seed):
+    """Write n_rows generated by make_chunk(rng, n) to path without holding them all."""
+    rng = np.random.default_rng(seed)
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        for start in range(0, n_rows, GENERATE_CHUNK_ROWS):
+            n = min(GENERATE_CHUNK_ROWS, n_rows - start)
+            make_chunk(rng, n).to_csv(out, index=False, header=(start == 0))
+
+
+def generate_inputs(data_dir, label, n_rows):
+    """
+    Generate the synthetic inputs for one size, reusing files that already exist.
+
+    Args:
+        data_dir (str): Directory for the generated files
+        label (str): Size label used in the file names (e.g. "1M")
+        n_rows (int): Number of rows in the main files
+
+    Returns:
+        dict: Paths of the generated files
+    """
+    size_dir = os.path.join(data_dir, label)
+    os.makedirs(size_dir, exist_ok=True)
+    codes = _codes()
+    paths = {
+        name: os.path.join(size_dir, f"{name}.csv")
+        for name in ("report", "lookup", "a", "b", "c", "hits")
+    }
+
+    def report_chunk(rng, n):
+        # Same shape as test_large.csv
+        return pd.DataFrame(
+            {
+                "report": rng.choice(REPORTS, n),
+                "Name": np.char.add(
+                    np.char.add(rng.choice(codes, n), " "), _random_words(rng, n, 8)
+                ),
+                "Category": rng.choice(CATEGORIES, n),
+                "age": rng.integers(18, 66, n),
+                "main_group": _random_words(rng, n, 5),
+                "Main_class": _random_words(rng, n, 5),
+            }
+        )
+
+    def id_column(rng, n):
+        # Roughly half of the ids match between A, B and C
+        return np.char.add("K", rng.integers(0, n_rows, n).astype(str))
+
+    def a_chunk(rng, n):
+        return pd.DataFrame(
+            {
+                "code": id_column(rng, n),
+                "Name": _random_words(rng, n, 6),
+                "value": rng.integers(0, 1000, n),
+            }
+        )
+
+    def b_chunk(rng, n):
+        return pd.DataFrame(
+            {
+                "codeID": id_column(rng, n),
+                "Name": _random_words(rng, n, 6),
+                "score": rng.random(n).round(4),
+                "flag": rng.integers(0, 2, n),
+            }
+        )
+
+    def c_chunk(rng, n):
+        return pd.DataFrame(
+            {
+                "codE": id_column(rng, n),
+                "Location": _random_words(rng, n, 4),
+                "Title": _random_words(rng, n, 7),
+                "Notes": _random_words(rng, n, 12),
+            }
+        )
+
+    def hits_chunk(rng, n):
+        return pd.DataFrame(
+            {
+                "empName": np.char.add("E", rng.integers(0, max(1, n_rows // 20), n).astype(str)),
+                "Category": rng.choice(CATEGORIES, n),
+                "Sub_Category": rng.choice(SUB_CATEGORIES, n),
+                "Hit": rng.integers(0, 10, n),
+            }
+        )
+
+    generators = {
+        "report": (report_chunk, n_rows),
+        "a": (a_chunk, n_rows),
+        "b": (b_chunk, n_rows),
+        "c": (c_chunk, max(1, n_rows // 2)),
+        "hits": (hits_chunk, n_rows),
+    }
+    for seed, (name, (make_chunk, rows)) in enumerate(generators.items()):
+        if not os.path.exists(paths[name]):
+            print(f"Generating {paths[name]} ({rows} rows)")
+            _write_in_chunks(paths[name], rows, make_chunk, seed)
+
+    if not os.path.exists(paths["lookup"]):
+        rng = np.random.default_rng(99)
+        # Leave some codes out so not every 'mist' row is enriched
+        lookup_codes = codes[: int(len(codes) * 0.8)]
+        pd.DataFrame(
+            {
+                "codebase": lookup_codes,
+                "main_group": _random_words(rng, len(lookup_codes), 5),
+                "Main_class": _random_words(rng, len(lookup_codes), 5),
+            }
+        ).to_csv(paths["lookup"], index=False)
+
+    paths["config"] = os.path.join(size_dir, "config.yaml")
+    paths["joined"] = os.path.join(size_dir, "joined.csv")
+    paths["db"] = os.path.join(size_dir, "bench.db")
+    config = {
+        "files": {
+            "a": {"path": paths["a"], "id_column": "code"},
+            "b": {"path": paths["b"], "id_column": "codeID"},
+            "c": {"path": paths["c"], "id_column": "codE"},
+        },
+        "columns_from_c": ["Location", "Title"],
+        "join_type": "inner",
+        "join_type_c": "left",
+        "output_path": paths["joined"],
+        "keep_only_a_identifier": True,
+        "redundant_fields": [{"column": "Name", "keep_from": "a"}],
+        "database": {"path": paths["db"], "table_name": "joined_data"},
+        "cache": {"enabled": False},
+    }
+    with open(paths["config"], "w") as file:
+        json.dump(config, file, indent=2)  # JSON is valid YAML
+
+    return paths
+
+
+# Each benchmark takes the generated paths and a scratch directory and returns
+# the wall time in seconds of the call being measured.
+
+
+def bench_process_csv(paths, scratch_dir, **kwargs):
+    import process_csv
+
+    target = os.path.join(scratch_dir, "report.csv")
+    shutil.copyfile(paths["report"], target)
+    start = time.perf_counter()
+    process_csv.process_files(target, paths["lookup"], **kwargs)
+    return time.perf_counter() - start
+
+
+def bench_remove_duplicates(paths, scratch_dir, **kwargs):
+    import remove_duplicates
+
+    start = time.perf_counter()
+    remove_duplicates.remove_duplicates(
+        paths["report"],
+        os.path.join(scratch_dir, "dedup.csv"),
+        ["Category", "age", "main_group"],
+        **kwargs,
+    )
+    return time.perf_counter() - start
+
+
+def bench_join_files(paths, scratch_dir):
+    import file_joiner
+
+    start = time.perf_counter()
+    file_joiner.join_files(paths["config"])
+    return time.perf_counter() - start
+
+
+def _ensure_joined(paths):
+    if not os.path.exists(paths["joined"]):
+        import file_joiner
+
+        file_joiner.join_files(paths["config"])
+
+
+def bench_load_csv_to_db(paths, scratch_dir, **kwargs):
+    import db_loader
+
+    _ensure_joined(paths)
+    start = time.perf_counter()
+    db_loader.DBLoader().load_csv_to_db(
+        paths["joined"], os.path.join(scratch_dir, "bench.db"), "joined_data", **kwargs
+    )
+    return time.perf_counter() - start
+
+
+def bench_insert_data(paths, scratch_dir, to_sql=False):
+    # Only the insert is timed; to_sql=True measures the DataFrame.to_sql call
+    # DatabaseManager.insert_data used to make
+    import sqlite3
+
+    import db_loader
+
+    _ensure_joined(paths)
+    df = pd.read_csv(paths["joined"])
+    db_path = os.path.join(scratch_dir, "insert.db")
+    start = time.perf_counter()
+    if to_sql:
+        conn = sqlite3.connect(db_path)
+        df.to_sql("joined_data", conn, if_exists="replace", index=False)
+        conn.close()
+    else:
+        db_loader.DatabaseManager(db_path).insert_data("joined_data", df)
+    return time.perf_counter() - start
+
+
+def bench_hit_percentages(paths, scratch_dir, **kwargs):
+    import Aggre
+
+    start = time.perf_counter()
+    Aggre.compute_hit_percentages(paths["hits"], **kwargs)
+    return time.perf_counter() - start
+
+
+BENCHMARKS = {
+    "process_csv": (bench_process_csv, "report", {}),
+    "process_csv_chunked": (bench_process_csv, "report", {"chunksize": 200_000}),
+    "remove_duplicates": (bench_remove_duplicates, "report", {}),
+    "remove_duplicates_streaming": (
+        bench_remove_duplicates,
+        "report",
+        {"method": "streaming"},
+    ),
+    "join_files": (bench_join_files, "a", {}),
+    "load_csv_to_db": (bench_load_csv_to_db, "joined", {}),
+    "load_csv_to_db_chunked": (bench_load_csv_to_db, "joined", {"chunksize": 200_000}),
+    "insert_data": (bench_insert_data, "joined", {}),
+    "insert_data_to_sql": (bench_insert_data, "joined", {"to_sql": True}),
+    "hit_percentages": (bench_hit_percentages, "hits", {}),
+    "hit_percentages_chunked": (
+        bench_hit_percentages,
+        "hits",
+        {"chunksize": 1_000_000},
+    ),
+}
+
+
+def _child(name, paths, scratch_dir, result_queue):
+    """Run one benchmark in a fresh process so its peak RSS is its own."""
+    sys.path[:0] = [ROOT_DIR, MG_DIR]
+    from instrumentation import peak_rss_mb
+
+    func, _, kwargs = BENCHMARKS[name]
+    # Keep the tools' progress output out of the results table
+    logging.disable(logging.INFO)
+    devnull = open(os.devnull, "w")
+    sys.stdout = devnull
+    try:
+        seconds = func(paths, scratch_dir, **kwargs)
+        result_queue.put({"seconds": seconds, "peak_rss_mb": peak_rss_mb()})
+    except BaseException as e:
+        result_queue.put({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        sys.stdout = sys.__stdout__
+        devnull.close()
+
+
+def _count_rows(path):
+    with open(path, "rb") as file:
+        return max(0, sum(1 for _ in file) - 1)
+
+
+def _exit_error(exitcode):
+    """Describe a benchmark process that exited without reporting a result."""
+    if exitcode is not None and exitcode < 0:
+        reason = f"killed by signal {-exitcode}"
+        if -exitcode == 9:
+            reason += " (out of memory?)"
+        return f"Benchmark process {reason}"
+    return f"Benchmark process exited with code {exitcode} without a result"
+
+
+def run_benchmark(name, paths, scratch_dir, timeout=None):
+    """
+    Run one benchmark in a subprocess.
+
+    The result queue is polled so that a child killed by the OOM killer, or
+    running longer than timeout seconds, is recorded as an error instead of
+    hanging the harness.
+
+    Returns:
+        dict: seconds, peak_rss_mb and rows_per_sec (or an error)
+    """
+    ctx = multiprocessing.get_context("spawn")
+    result_queue = ctx.Queue()
+    process = ctx.Process(
+        target=_child, args=(name, paths, scratch_dir, result_queue)
+    )
+    process.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    result = None
+    while result is None:
+        try:
+            result = result_queue.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                # A result put just before exiting may still be in flight
+                try:
+                    result = result_queue.get(timeout=1)
+                except queue.Empty:
+                    result = {"error": _exit_error(process.exitcode)}
+            elif deadline is not None and time.monotonic() > deadline:
+                process.kill()
+                result = {"error": f"Timed out after {timeout} seconds"}
+    process.join()
+
+    if "error" not in result:
+        rows = _count_rows(paths[BENCHMARKS[name][1]])
+        result["rows"] = rows
+        result["rows_per_sec"] = rows / result["seconds"] if result["seconds"] else None
+    return result
+
+
+def measure_import_time(module):
+    """
+    Import module in a fresh interpreter under python -X importtime.
+
+    Returns:
+        tuple: (cumulative import time of the module in seconds,
+                whether pandas was imported along with it)
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=MG_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            cumulative[parts[2].strip()] = int(parts[1])
+    return cumulative[module] / 1e6, "pandas" in cumulative
+
+
+def measure_startup(paths):
+    """
+    Measure import time of the mg CLIs and the wall time of small db_loader loads
+    with and without the csv fast path.
+
+    Returns:
+        list: One result per measurement, in the same shape as the benchmarks
+    """
+    results = []
+    for module in ("db_loader", "file_joiner"):
+        seconds, imports_pandas = measure_import_time(module)
+        results.append(
+            {
+                "benchmark": f"import_{module}",
+                "size": "-",
+                "seconds": seconds,
+                "peak_rss_mb": None,
+                "imports_pandas": imports_pandas,
+            }
+        )
+
+    if not os.path.exists(paths["joined"]):
+        sys.path[:0] = [ROOT_DIR, MG_DIR]
+        import file_joiner
+
+        file_joiner.join_files(paths["config"])
+    db_path = os.path.join(os.path.dirname(paths["joined"]), "startup.db")
+    for name, extra_args in (
+        ("cli_db_loader_csv", []),
+        ("cli_db_loader_csv_fast_path", ["--fast-path"]),
+    ):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(MG_DIR, "db_loader.py"), "--csv", paths["joined"],
+             "--db", db_path, *extra_args],
+            capture_output=True,
+            check=True,
+        )
+        results.append(
+            {
+                "benchmark": name,
+                "size": "10k",
+                "seconds": time.perf_counter() - start,
+                "peak_rss_mb": None,
+            }
+        )
+        os.remove(db_path)
+    return results
+
+
+def compare_with_baseline(results, baseline):
+    """Print each result next to the baseline run of the same benchmark and size."""
+    previous = {(r["benchmark"], r["size"]): r for r in baseline.get("results", [])}
+    print(f"\n{'benchmark':<30}{'size':>6}{'seconds':>10}{'baseline':>10}{'change':>9}"
+          f"{'peak MiB':>10}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['benchmark']:<30}{result['size']:>6}  ERROR {result['error']}")
+            continue
+        base = previous.get((result["benchmark"], result["size"]))
+        base_seconds = base.get("seconds") if base else None
+        change = (
+            f"{(result['seconds'] / base_seconds - 1) * 100:+.0f}%"
+            if base_seconds
+            else "-"
+        )
+        peak = result["peak_rss_mb"]
+        print(
+            f"{result['benchmark']:<30}{result['size']:>6}{result['seconds']:>10.2f}"
+            f"{'-' if base_seconds is None else f'{base_seconds:.2f}':>10}"
+            f"{change:>9}{'-' if peak is None else round(peak):>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the CSV tools and the mg pipeline on synthetic data"
+    )
+    parser.add_argument(
+        "--sizes",
+        default="10k,1M",
+        help=f"Comma-separated input sizes ({', '.join(SIZES)})",
+    )
+    parser.add_argument(
+        "--benchmarks",
+        default=",".join(BENCHMARKS),
+        help="Comma-separated benchmarks to run",
+    )
+    parser.add_argument("--data-dir", default="bench_data", help="Where inputs are generated")
+    parser.add_argument("--output", default="bench_results.json", help="Results JSON file")
+    parser.add_argument(
+        "--baseline", default="bench_baseline.json", help="Baseline JSON to compare with"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Also store these results as the new baseline",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Record a benchmark as failed after this many seconds",
+    )
+    parser.add_argument(
+        "--no-startup",
+        dest="startup",
+        action="store_false",
+        help="Skip the import-time and small-file CLI startup measurements",
+    )
+    args = parser.parse_args()
+
+    sizes = args.sizes.split(",")
+    names = args.benchmarks.split(",")
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f"Unknown size '{size}'")
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"Unknown benchmark '{name}'")
+
+    results = []
+    for size in sizes:
+        paths = generate_inputs(args.data_dir, size, SIZES[size])
+        scratch_dir = os.path.join(args.data_dir, size, "scratch")
+        os.makedirs(scratch_dir, exist_ok=True)
+        for name in names:
+            print(f"Running {name} on {size} rows...")
+            result = run_benchmark(name, paths, scratch_dir, args.timeout)
+            results.append({"benchmark": name, "size": size, **result})
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    if args.startup:
+        print("Measuring CLI startup...")
+        results.extend(measure_startup(generate_inputs(args.data_dir, "10k", SIZES["10k"])))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {args.output}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+    compare_with_baseline(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
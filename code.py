@@ -1,5 +1,7 @@
 import pandas as pd
 
+from enrich import EnrichmentRule, Enricher
+
 # Sample main dataframe
 df_main = pd.DataFrame({
     'Name': ['COMP PETER', 'EVT MAKES', 'DVD PLAY'],
@@ -17,29 +19,24 @@ df_lookup = pd.DataFrame({
     'Main_class': ['analytics', 'basicPackage', 'models']
 })
 
-# Extract potential code from 'Name'
-df_main['_name_code'] = df_main['Name'].fillna('').str.extract(r'^(\w+)')
-
-# Merge only for rows with Category == 'UTILITY'
-df_main_utility = df_main[df_main['Category'] == 'UTILITY'].copy()
-
-df_merged = df_main_utility.merge(
-    df_lookup,
-    left_on='_name_code',
-    right_on='codebase',
-    how='left',
-    suffixes=('', '_lookup')
-)
-
-# Apply updates conditionally
-for col in ['main_group', 'Main_class']:
-    df_main.loc[df_merged.index, col] = df_merged[f'{col}_lookup'].combine_first(df_merged[col])
-
-# Update empty codebase in main only where lookup match was found
-df_main.loc[df_merged.index, 'codebase'] = df_main.loc[df_merged.index, 'codebase'].replace('', pd.NA)
-df_main.loc[df_merged.index, 'codebase'] = df_main.loc[df_merged.index, 'codebase'].combine_first(df_merged['codebase'])
-
-# Drop temporary column
-df_main.drop(columns=['_name_code'], inplace=True)
+# UTILITY rows take main_group/Main_class from the lookup by the first word of
+# Name, and the matched codebase where theirs is empty (see
+# enrich_rules_utility.yaml)
+utility_rule = {
+    'name': 'utility_codes',
+    'filter': {'column': 'Category', 'equals': 'UTILITY'},
+    'key': {'column': 'Name', 'pattern': r'^(\w+)'},
+    'lookup': {'data': df_lookup, 'key_column': 'codebase'},
+    'targets': {
+        'main_group': 'main_group',
+        'Main_class': 'Main_class',
+        'codebase': {'from': 'codebase', 'mode': 'fill_empty'},
+    },
+}
+
+enricher = Enricher([EnrichmentRule(utility_rule)])
+
+# The engine works on text values, as read with dtype=str
+df_main = enricher.enrich(df_main.astype(str))
 
 print(df_main)
@@ -0,0 +1,274 @@
+import argparse
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import yaml
+
+DEFAULT_CHUNKSIZE = 100_000
+MODES = ("overwrite", "fill_empty")
+FILTER_OPS = ("equals", "not_equals", "in", "matches", "empty", "not_empty")
+
+
+class EnrichmentRule:
+    """
+    One enrichment rule from the YAML rule list.
+
+    For the rows matching `filter`, a key is extracted from `key.column` with
+    `key.pattern` (first capture group) and looked up in `lookup.path` on
+    `lookup.key_column`; matched rows get the lookup values in `targets`.
+    Rules built in code can pass a DataFrame as `lookup.data` instead of a path.
+
+        - name: mist_codes
+          filter: {column: report, equals: mist}
+          key: {column: Name, pattern: '^(\\w+)'}
+          lookup: {path: lookup_file.csv, key_column: codebase}
+          targets:
+            main_group: main_group            # target column: lookup column
+            codebase: {from: codebase, mode: fill_empty}
+          mode: overwrite                     # default mode of the targets
+          default: ""                         # optional: reset targets first
+
+    `filter` may be a single condition or a list of conditions that must all
+    hold, each one column with one of FILTER_OPS; without a filter every row
+    is a candidate. overwrite replaces the target for every matched row,
+    fill_empty only where the target is empty. Targets that do not exist yet
+    are created empty.
+    """
+
+    def __init__(self, config, base_dir=""):
+        self.name = config.get("name", "<unnamed>")
+        try:
+            self.key_column = config["key"]["column"]
+            self.pattern = config["key"].get("pattern", r"^(.*)$")
+            lookup = config["lookup"]
+            self.lookup_key = lookup["key_column"]
+            if "data" in lookup:
+                self.lookup = lookup["data"]
+            else:
+                self.lookup = os.path.join(base_dir, lookup["path"])
+            targets = config["targets"]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Rule '{self.name}' is missing {e}") from None
+
+        self.default = config.get("default")
+        mode = config.get("mode", "overwrite")
+        self.targets = []
+        for target, source in targets.items():
+            if isinstance(source, dict):
+                self.targets.append(
+                    (target, source.get("from", target), source.get("mode", mode))
+                )
+            else:
+                self.targets.append((target, source, mode))
+        for target, _, target_mode in self.targets:
+            if target_mode not in MODES:
+                raise ValueError(
+                    f"Rule '{self.name}': unknown mode '{target_mode}' for '{target}', "
+                    f"expected one of {MODES}"
+                )
+
+        conditions = config.get("filter") or []
+        self.conditions = [conditions] if isinstance(conditions, dict) else list(conditions)
+        for condition in self.conditions:
+            ops = [op for op in condition if op != "column"]
+            if "column" not in condition or len(ops) != 1 or ops[0] not in FILTER_OPS:
+                raise ValueError(
+                    f"Rule '{self.name}': a filter condition needs a column and one of "
+                    f"{FILTER_OPS}, got {condition}"
+                )
+
+    @property
+    def columns(self):
+        """Input columns the rule reads."""
+        return {self.key_column} | {condition["column"] for condition in self.conditions}
+
+    @property
+    def lookup_name(self):
+        """The lookup file, or a placeholder for an in-memory lookup (for messages)."""
+        return self.lookup if isinstance(self.lookup, str) else "<DataFrame lookup>"
+
+
+def load_rules(rules_path):
+    """Read the rule list from a YAML file (a list, or a mapping with a 'rules' list)."""
+    with open(rules_path, "r") as file:
+        config = yaml.safe_load(file)
+    rules = config.get("rules", []) if isinstance(config, dict) else config
+    base_dir = os.path.dirname(os.path.abspath(rules_path))
+    return [EnrichmentRule(rule, base_dir) for rule in rules or []]
+
+
+def _condition_mask(df, condition):
+    """Evaluate one filter condition on an all-text DataFrame."""
+    values = df[condition["column"]]
+    if "equals" in condition:
+        return values == str(condition["equals"])
+    if "not_equals" in condition:
+        return values != str(condition["not_equals"])
+    if "in" in condition:
+        return values.isin([str(value) for value in condition["in"]])
+    if "matches" in condition:
+        return values.str.contains(condition["matches"], regex=True)
+    if "empty" in condition:
+        return (values == "") == bool(condition["empty"])
+    return values != ""  # not_empty
+
+
+class Enricher:
+    """
+    Apply a list of rules to DataFrames in a single vectorized pass.
+
+    Lookups are loaded once. Per DataFrame every distinct filter condition and
+    every distinct (column, pattern) key extraction is computed once and shared
+    by the rules using it, until a rule writes to its column. The rules are
+    applied in order, so a later rule sees the values written by earlier ones
+    (e.g. for fill_empty or a filter on an enriched column).
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        loaded = {}
+        self._lookups = []
+        for rule in self.rules:
+            source = rule.lookup if isinstance(rule.lookup, str) else id(rule.lookup)
+            if (source, rule.lookup_key) not in loaded:
+                loaded[(source, rule.lookup_key)] = self._load_lookup(
+                    rule.lookup, rule.lookup_key
+                )
+            lookup = loaded[(source, rule.lookup_key)]
+            missing = [
+                column
+                for _, column, _ in rule.targets
+                if column not in lookup.columns
+            ]
+            if missing:
+                raise ValueError(
+                    f"Rule '{rule.name}': columns {missing} not in {rule.lookup_name}"
+                )
+            self._lookups.append(lookup)
+
+    @staticmethod
+    def _load_lookup(source, key_column):
+        """
+        Read a lookup (path or DataFrame) as text indexed by key_column.
+
+        Later rows win when a key appears more than once.
+        """
+        if isinstance(source, str):
+            lookup = pd.read_csv(source, dtype=str, keep_default_na=False)
+        else:
+            lookup = source.fillna("").astype(str)
+        lookup = lookup.drop_duplicates(subset=key_column, keep="last")
+        return lookup.set_index(key_column, drop=False)
+
+    def enrich(self, df):
+        """
+        Enrich an all-text DataFrame in place and return it.
+
+        Empty means the empty string, as produced by reading with dtype=str and
+        keep_default_na=False.
+        """
+        masks = {}
+        keys = {}
+        defaults = {}
+        for rule in self.rules:
+            missing = [col for col in rule.columns if col not in df.columns]
+            if missing:
+                raise ValueError(f"Rule '{rule.name}': columns {missing} not in the data")
+            for target, _, _ in rule.targets:
+                if rule.default is not None:
+                    defaults.setdefault(target, str(rule.default))
+                elif target not in df.columns:
+                    df[target] = ""
+        for target, value in defaults.items():
+            df[target] = value
+
+        for rule, lookup in zip(self.rules, self._lookups):
+            mask = pd.Series(True, index=df.index)
+            for condition in rule.conditions:
+                condition_key = (condition["column"], repr(sorted(condition.items())))
+                if condition_key not in masks:
+                    masks[condition_key] = _condition_mask(df, condition)
+                mask &= masks[condition_key]
+            if not mask.any():
+                continue
+
+            key_id = (rule.key_column, rule.pattern)
+            if key_id not in keys:
+                keys[key_id] = df[rule.key_column].str.extract(rule.pattern, expand=False)
+            rule_keys = keys[key_id][mask].dropna()
+            rule_keys = rule_keys[rule_keys.isin(lookup.index)]
+            if rule_keys.empty:
+                continue
+
+            matched = lookup.loc[rule_keys.to_numpy()]
+            for target, source, mode in rule.targets:
+                values = pd.Series(matched[source].to_numpy(), index=rule_keys.index)
+                if mode == "fill_empty":
+                    values = values[df.loc[values.index, target] == ""]
+                df.loc[values.index, target] = values
+
+            # Masks and keys computed from the columns just written are stale
+            written = {target for target, _, _ in rule.targets}
+            masks = {k: m for k, m in masks.items() if k[0] not in written}
+            keys = {k: v for k, v in keys.items() if k[0] not in written}
+        return df
+
+
+def enrich_file(input_file, rules_path, output_file=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Apply the YAML rules to a CSV file chunk by chunk.
+
+    Values are read and written as text. Without output_file the input is
+    replaced atomically once every chunk has been written.
+
+    Args:
+        input_file (str): CSV file to enrich
+        rules_path (str): YAML rule list (see EnrichmentRule)
+        output_file (str, optional): Where to write the result
+        chunksize (int): Rows per chunk
+
+    Returns:
+        int: Number of rows written
+    """
+    enricher = Enricher(load_rules(rules_path))
+    target = output_file or input_file
+    target_dir = os.path.dirname(os.path.abspath(target))
+    fd, tmp_path = tempfile.mkstemp(suffix=".csv", dir=target_dir)
+
+    total_rows = 0
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as out:
+            reader = pd.read_csv(
+                input_file, chunksize=chunksize, dtype=str, keep_default_na=False
+            )
+            for i, chunk in enumerate(reader):
+                enricher.enrich(chunk).to_csv(out, index=False, header=(i == 0))
+                total_rows += len(chunk)
+        if os.path.exists(target):
+            shutil.copymode(target, tmp_path)
+        os.replace(tmp_path, target)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    print(
+        f"Applied {len(enricher.rules)} rules to {total_rows} rows of {input_file}; "
+        f"saved to {target}"
+    )
+    return total_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Enrich a CSV file from lookup files using YAML rules"
+    )
+    parser.add_argument("input_file")
+    parser.add_argument("--rules", default="enrich_rules.yaml", help="YAML rule list")
+    parser.add_argument("--output", help="Write here instead of updating the input")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+
+    enrich_file(args.input_file, args.rules, args.output, args.chunksize)
@@ -1,11 +1,25 @@
-import pandas as pd
+from __future__ import annotations
+
 import sqlite3
-import yaml
 import argparse
 import os
 import logging
 import sys
-from typing import Dict, List, Any, Optional, Tuple
+import itertools
+import time
+import csv
+import re
+import random
+import json
+import hashlib
+from typing import TYPE_CHECKING, Dict, List, Any, Iterable, Optional, Tuple
+
+from instrumentation import PROFILER, span
+
+# pandas, numpy and yaml are imported where they are used, so a small load
+# through the csv/sqlite fast path (and --help) does not pay for them
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 # Set up logging
@@ -14,6 +28,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# PRAGMAs applied for the duration of a bulk load (overridable through
+# database.load_pragmas in the config). journal_mode persists in the database
+# file, so it is set back afterwards unless the config sets it explicitly.
+DEFAULT_LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "cache_size": -262144,  # Negative values are KiB, i.e. 256 MiB
+    "temp_store": "MEMORY",
+}
+
+FILE_FORMATS = ("csv", "parquet", "feather")
+
+# With the fast path enabled (database.fast_path or --fast-path), CSV files up
+# to this size are loaded with the csv module instead of pandas (overridable
+# through database.fast_path_max_bytes)
+FAST_PATH_MAX_BYTES = 8 * 1024 * 1024
+
 
 class ConfigManager:
     """Handle configuration loading and validation."""
@@ -21,6 +52,8 @@ class ConfigManager:
     @staticmethod
     def load_config(config_path: str) -> Dict[str, Any]:
         """Load configuration from YAML file."""
+        import yaml
+
         try:
             with open(config_path, "r") as file:
                 config = yaml.safe_load(file)
@@ -41,8 +74,8 @@ class DataLoader:
     """Handle data loading and preprocessing."""
 
     @staticmethod
-    def load_csv(file_path: str) -> pd.DataFrame:
-        """Load CSV file into a DataFrame."""
+    def check_exists(file_path: str) -> None:
+        """Raise FileNotFoundError if the CSV file does not exist."""
         if not os.path.exists(file_path):
             logger.error(f"CSV file not found: {file_path}")
             logger.info("You need to run file_joiner.py first to create the CSV file.")
@@ -50,8 +83,125 @@ class DataLoader:
                 f"File not found: {file_path}. Run file_joiner.py first."
             )
 
+    @staticmethod
+    def detect_format(file_path: str, file_format: Optional[str] = None) -> str:
+        """Return "parquet", "feather" or "csv" based on the file extension.
+
+        An explicit file_format (e.g. the configured output_format) wins.
+        """
+        if file_format:
+            if file_format not in FILE_FORMATS:
+                raise ValueError(
+                    f"Unknown file format '{file_format}', "
+                    f"expected one of {FILE_FORMATS}"
+                )
+            return file_format
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension in (".parquet", ".pq"):
+            return "parquet"
+        if extension in (".feather", ".arrow", ".ipc"):
+            return "feather"
+        return "csv"
+
+    @staticmethod
+    def iter_csv(
+        file_path: str,
+        chunksize: int,
+        nrows: Optional[int] = None,
+        dtype: Optional[Any] = None,
+        columns: Optional[List[str]] = None,
+        keep_default_na: bool = True,
+        file_format: Optional[str] = None,
+    ) -> Iterable[pd.DataFrame]:
+        """Read a CSV, Parquet or Feather file lazily in chunks.
+
+        CSV files are read in chunks of chunksize rows; Parquet files in
+        batches of chunksize rows and Feather files one record batch at a time.
+        Only the given columns are read, if any. The format is detected from
+        the extension unless file_format is given.
+        """
+        import pandas as pd
+
+        DataLoader.check_exists(file_path)
+        file_format = DataLoader.detect_format(file_path, file_format)
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            batches = pq.ParquetFile(file_path).iter_batches(
+                batch_size=chunksize, columns=columns
+            )
+            return (batch.to_pandas() for batch in batches)
+        if file_format == "feather":
+            import pyarrow as pa
+
+            reader = pa.ipc.open_file(file_path)
+            return (
+                reader.get_batch(i).to_pandas()[columns or slice(None)]
+                for i in range(reader.num_record_batches)
+            )
+
         try:
-            df = pd.read_csv(file_path)
+            return pd.read_csv(
+                file_path,
+                chunksize=chunksize,
+                nrows=nrows,
+                dtype=dtype,
+                usecols=columns,
+                keep_default_na=keep_default_na,
+            )
+        except pd.errors.EmptyDataError:
+            logger.error(f"CSV file is empty: {file_path}")
+            raise
+
+    @staticmethod
+    def read_schema(
+        file_path: str,
+        columns: Optional[List[str]] = None,
+        file_format: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Return an empty DataFrame typed like a Parquet or Feather file.
+
+        Only the file's schema is read, not its data.
+        """
+        import pyarrow as pa
+
+        DataLoader.check_exists(file_path)
+        if DataLoader.detect_format(file_path, file_format) == "parquet":
+            import pyarrow.parquet as pq
+
+            schema = pq.read_schema(file_path)
+        else:
+            with pa.memory_map(file_path) as source:
+                schema = pa.ipc.open_file(source).schema
+        df = schema.empty_table().to_pandas()
+        return df[columns] if columns else df
+
+    @staticmethod
+    def load_csv(
+        file_path: str,
+        nrows: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        file_format: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Load a CSV, Parquet or Feather file (or its first nrows rows).
+
+        The format is detected from the file extension unless file_format is
+        given. Only the given columns are read, if any.
+        """
+        import pandas as pd
+
+        DataLoader.check_exists(file_path)
+        file_format = DataLoader.detect_format(file_path, file_format)
+
+        try:
+            if file_format == "parquet":
+                df = pd.read_parquet(file_path, columns=columns)
+            elif file_format == "feather":
+                df = pd.read_feather(file_path, columns=columns)
+            else:
+                df = pd.read_csv(file_path, nrows=nrows, usecols=columns)
+            if nrows is not None and file_format != "csv":
+                df = df.head(nrows)
             logger.info(f"Loaded {len(df)} rows from {file_path}")
             return df
         except pd.errors.EmptyDataError:
@@ -61,7 +211,7 @@ class DataLoader:
             logger.error(f"Error parsing CSV file: {file_path}")
             raise
         except Exception as e:
-            logger.error(f"Unexpected error loading CSV file {file_path}: {e}")
+            logger.error(f"Unexpected error loading file {file_path}: {e}")
             raise
 
 
@@ -78,6 +228,9 @@ class SchemaInferencer:
             "datetime64[ns]": "TEXT",
             "timedelta64[ns]": "TEXT",
             "object": "TEXT",
+            "Int64": "INTEGER",
+            "Float64": "REAL",
+            "boolean": "INTEGER",
         }
 
         column_types = {}
@@ -89,13 +242,301 @@ class SchemaInferencer:
         print(column_types)
         return column_types
 
+    # Value kinds of the dtypes infer_column_types maps to INTEGER or REAL
+    _DTYPE_KINDS = {
+        "int64": "integer",
+        "Int64": "integer",
+        "float64": "real",
+        "Float64": "real",
+        "bool": "boolean",
+        "boolean": "boolean",
+    }
+
+    @staticmethod
+    def kinds_from_dtypes(df: pd.DataFrame) -> Dict[str, str]:
+        """Return the value kind of each column matching its pandas dtype.
+
+        The DataFrame's CSV text converted to these kinds (see
+        convert_text_frame) gets the column types infer_column_types gives it.
+        """
+        return {
+            column: SchemaInferencer._DTYPE_KINDS.get(str(dtype), "text")
+            for column, dtype in df.dtypes.items()
+        }
+
+    # Value kinds, ordered so that the narrowest applicable kind is tried first
+    _INTEGER_RE = re.compile(r"^[+-]?(0|[1-9]\d{0,17})$")
+    _DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$")
+    _LEADING_ZERO_RE = re.compile(r"^[+-]?0\d")
+    _BOOLEAN_VALUES = {"true", "false", "True", "False", "TRUE", "FALSE"}
+    _NULL_VALUES = {"", "NA", "N/A", "NULL", "null", "NaN", "nan", "None"}
+
+    # SQLite type emitted for each kind
+    _KIND_TYPES = {
+        "boolean": "INTEGER",
+        "integer": "INTEGER",
+        "real": "REAL",
+        "date": "TEXT",
+        "text": "TEXT",
+    }
+
+    @staticmethod
+    def _value_kind(value: str) -> Optional[str]:
+        """Classify one raw CSV value, or None if it is a null marker."""
+        if value in SchemaInferencer._NULL_VALUES:
+            return None
+        if value in SchemaInferencer._BOOLEAN_VALUES:
+            return "boolean"
+        if SchemaInferencer._LEADING_ZERO_RE.match(value):
+            # Codes such as "007" would lose their zeros as numbers
+            return "text"
+        if SchemaInferencer._INTEGER_RE.match(value):
+            return "integer"
+        if SchemaInferencer._DATE_RE.match(value):
+            return "date"
+        try:
+            float(value)
+            return "real"
+        except ValueError:
+            return "text"
+
+    @staticmethod
+    def _widen(current: Optional[str], kind: Optional[str]) -> Optional[str]:
+        """Return the narrowest kind that can hold both kinds."""
+        if current is None or current == kind:
+            return kind
+        if kind is None:
+            return current
+        if {current, kind} == {"integer", "real"}:
+            return "real"
+        return "text"
+
+    @staticmethod
+    def sample_rows(
+        file_path: str, head_rows: int = 1000, sample_rows: int = 10000, seed: int = 0
+    ) -> Tuple[List[str], List[List[str]]]:
+        """Read the header, the first head_rows rows and a random sample of lines.
+
+        The random rows are taken by seeking to random byte offsets and reading
+        the next full line, so the file is never scanned end to end. This
+        assumes no quoted field contains a newline.
+
+        Returns:
+            Tuple of (header, sampled rows as lists of raw strings)
+        """
+        DataLoader.check_exists(file_path)
+        rng = random.Random(seed)
+
+        with open(file_path, "rb") as f:
+            lines = [f.readline() for _ in range(head_rows + 1)]
+            head_end = f.tell()
+            file_size = os.fstat(f.fileno()).st_size
+
+            if file_size > head_end and sample_rows > 0:
+                for offset in sorted(
+                    rng.randrange(head_end, file_size) for _ in range(sample_rows)
+                ):
+                    f.seek(offset)
+                    f.readline()  # Skip the partial line at the offset
+                    lines.append(f.readline())
+
+        # utf-8-sig drops the byte order mark Excel puts before the header
+        parsed = csv.reader(
+            line.decode("utf-8-sig", errors="replace") for line in lines if line
+        )
+        header = next(parsed, [])
+        rows = list(parsed)
+        return header, [row for row in rows if len(row) == len(header)]
+
+    @staticmethod
+    def infer_kinds(header: List[str], rows: List[List[str]]) -> Dict[str, str]:
+        """Return the widened value kind of each column over rows of raw strings.
+
+        Widening does not depend on order, so each distinct value is classified
+        once and a column stops being scanned as soon as it becomes text.
+        """
+        kinds = {column: "text" for column in header}
+        for column, values in zip(header, zip(*rows)):
+            kind: Optional[str] = None
+            for value in set(values):
+                kind = SchemaInferencer._widen(kind, SchemaInferencer._value_kind(value))
+                if kind == "text":
+                    break
+            kinds[column] = kind or "text"
+        return kinds
+
+    @staticmethod
+    def widen_kinds(
+        kinds: Dict[str, Optional[str]], df: pd.DataFrame
+    ) -> Dict[str, Optional[str]]:
+        """Widen kinds over the values of a text DataFrame, in place, and return them.
+
+        kinds holds the kind of each column over the values seen so far (None
+        while there were only nulls), so data too large for memory can be
+        classified chunk by chunk. Missing values (NaN) count as nulls.
+        """
+        for column in df.columns:
+            kind = kinds.get(column)
+            if kind != "text":
+                for value in df[column].dropna().unique():
+                    kind = SchemaInferencer._widen(
+                        kind, SchemaInferencer._value_kind(value)
+                    )
+                    if kind == "text":
+                        break
+            kinds[column] = kind
+        return kinds
+
+    @staticmethod
+    def infer_from_file(
+        file_path: str, head_rows: int = 1000, sample_rows: int = 10000
+    ) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Infer the schema from a sample of the file without parsing all of it.
+
+        Every sampled value is classified as boolean, integer, real, date or
+        text and the column widens to the narrowest kind that fits them all
+        (integer + real -> real, anything else mixed -> text). Integers with
+        leading zeros or more than 18 digits are kept as text.
+
+        Returns:
+            Tuple of (SQLite column types, value kind of each column)
+        """
+        header, rows = SchemaInferencer.sample_rows(file_path, head_rows, sample_rows)
+
+        kinds = SchemaInferencer.infer_kinds(header, rows)
+        column_types = {
+            column: SchemaInferencer._KIND_TYPES[kind] for column, kind in kinds.items()
+        }
+
+        logger.info(
+            f"Inferred types for {len(column_types)} columns "
+            f"from {len(rows)} sampled rows"
+        )
+        return column_types, kinds
+
+
+def convert_raw_values(values: Iterable[str], kind: str) -> List[Any]:
+    """Convert raw CSV values of one kind to SQLite-bindable values (None for nulls)."""
+    nulls = SchemaInferencer._NULL_VALUES
+    if kind == "integer":
+        return [None if value in nulls else int(value) for value in values]
+    if kind == "real":
+        return [None if value in nulls else float(value) for value in values]
+    if kind == "boolean":
+        return [
+            None if value in nulls else int(value.lower() == "true")
+            for value in values
+        ]
+    return [None if value in nulls else value for value in values]
+
+
+# Range of SQLite INTEGER; sqlite3 cannot bind Python ints outside it
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+def _convert_value(value: str, kind: str) -> Any:
+    """Convert one raw value to kind, or the nearest wider kind, else keep the text.
+
+    Integers outside the int64 range are kept as text.
+    """
+    if kind == "boolean" and value.lower() in ("true", "false"):
+        return int(value.lower() == "true")
+    if kind == "integer":
+        try:
+            number = int(value)
+        except ValueError:
+            pass
+        else:
+            return number if _INT64_MIN <= number <= _INT64_MAX else value
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def convert_text_column(values: pd.Series, kind: str) -> pd.Series:
+    """Convert a column read as text (dtype=str, keep_default_na=False) to kind.
+
+    Null markers become missing values. A sample can miss values that do not
+    fit the inferred kind; rather than failing the load, the chunk holding one
+    falls back to converting value by value, keeping such values as text
+    (SQLite stores them as they are).
+    """
+    import pandas as pd
+
+    nulls = (values.isna() | values.isin(SchemaInferencer._NULL_VALUES)).to_numpy()
+    if kind in ("text", "date"):
+        return values.mask(nulls)
+
+    present = values[~nulls]
+    try:
+        if kind == "integer":
+            return present.astype("int64").astype("Int64").reindex(values.index)
+        if kind == "real":
+            return present.astype("float64").reindex(values.index)
+        lowered = present.str.lower()
+        if lowered.isin(["true", "false"]).all():
+            return (lowered == "true").astype("boolean").reindex(values.index)
+    except (ValueError, OverflowError):
+        pass
+
+    converted = [
+        None if null else _convert_value(value, kind)
+        for value, null in zip(values.tolist(), nulls)
+    ]
+    return pd.Series(converted, index=values.index, dtype=object)
+
+
+def convert_text_frame(df: pd.DataFrame, kinds: Dict[str, str]) -> pd.DataFrame:
+    """Convert every column of a DataFrame read as text with convert_text_column."""
+    import pandas as pd
+
+    return pd.DataFrame(
+        {column: convert_text_column(df[column], kinds[column]) for column in df},
+        index=df.index,
+    )
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table or column name for use in SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def column_values(series: pd.Series) -> List[Any]:
+    """Convert a column to SQLite-bindable Python values (None for missing)."""
+    import numpy as np
+
+    if not isinstance(series.dtype, np.dtype):
+        # Nullable extension dtypes (Int64, boolean, string, ...)
+        return series.to_numpy(dtype=object, na_value=None).tolist()
+    values = series.to_numpy()
+    if series.dtype.kind in "iu":
+        return values.tolist()
+    if series.dtype.kind == "b":
+        return values.astype(np.int64).tolist()
+    if series.dtype.kind == "f":
+        result = values.tolist()
+        missing = np.flatnonzero(np.isnan(values))
+    elif series.dtype.kind in "mM":
+        missing = np.flatnonzero(series.isna().to_numpy())
+        result = series.astype(str).tolist()
+    else:
+        missing = np.flatnonzero(series.isna().to_numpy())
+        result = series.astype(object).tolist()
+    for i in missing:
+        result[i] = None
+    return result
+
 
 class DatabaseManager:
     """Handle database operations."""
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, load_pragmas: Optional[Dict[str, Any]] = None):
         """Initialize database manager with database path."""
         self.db_path = db_path
+        self.load_pragmas = {**DEFAULT_LOAD_PRAGMAS, **(load_pragmas or {})}
+        self.keep_journal_mode = "journal_mode" in (load_pragmas or {})
         # Create directory for database if it doesn't exist
         db_dir = os.path.dirname(os.path.abspath(db_path))
         if db_dir and not os.path.exists(db_dir):
@@ -143,26 +584,290 @@ class DatabaseManager:
             logger.error(f"Unexpected error creating table: {e}")
             raise
 
-    def insert_data(self, table_name: str, df: pd.DataFrame) -> None:
-        """Insert DataFrame data into table."""
+    def insert_data(
+        self,
+        table_name: str,
+        df: pd.DataFrame,
+        if_exists: str = "replace",
+        column_types: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Insert DataFrame data into table.
+
+        With if_exists="replace" the table is recreated from column_types
+        (inferred from df if not given); with "append" rows are added to the
+        existing table.
+        """
+        if column_types is None:
+            column_types = SchemaInferencer.infer_column_types(df)
+        self.bulk_load(table_name, [df], column_types, replace=(if_exists == "replace"))
+
+    def bulk_load(
+        self,
+        table_name: str,
+        chunks: Iterable[pd.DataFrame],
+        column_types: Dict[str, str],
+        replace: bool = True,
+        batch_size: int = 50000,
+    ) -> int:
+        """Load DataFrames into a table in a single transaction.
+
+        Each DataFrame is converted column-wise to Python values batch_size
+        rows at a time and fed to bulk_load_rows, so only one batch is held as
+        Python objects however large the DataFrame is.
+
+        Returns:
+            Number of rows inserted
+        """
+        rows = itertools.chain.from_iterable(
+            zip(*(column_values(batch[column]) for column in column_types))
+            for df in chunks
+            for batch in (
+                df.iloc[start : start + batch_size]
+                for start in range(0, len(df), batch_size)
+            )
+        )
+        return self.bulk_load_rows(
+            table_name, rows, column_types, replace=replace, batch_size=batch_size
+        )
+
+    def bulk_load_rows(
+        self,
+        table_name: str,
+        rows: Iterable[Tuple[Any, ...]],
+        column_types: Dict[str, str],
+        replace: bool = True,
+        batch_size: int = 50000,
+    ) -> int:
+        """Load row tuples (in column_types order) into a table in one transaction.
+
+        Rows are inserted with executemany over one prepared INSERT, with the
+        load PRAGMAs applied; the database's journal mode is restored afterwards
+        unless the config sets it. With replace=True the table is dropped and
+        recreated from column_types inside the same transaction.
+
+        Returns:
+            Number of rows inserted
+        """
+        columns_def = [
+            f'"{column}" {data_type}' for column, data_type in column_types.items()
+        ]
+        quoted_columns = ", ".join(f'"{column}"' for column in column_types)
+        placeholders = ", ".join("?" for _ in column_types)
+        insert_sql = (
+            f'INSERT INTO "{table_name}" ({quoted_columns}) VALUES ({placeholders})'
+        )
+
+        conn = self.create_connection()
+        total_rows = 0
+        previous_journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
         try:
-            conn = self.create_connection()
-            df.to_sql(table_name, conn, if_exists="replace", index=False)
-            logger.info(f"Inserted {len(df)} rows into table '{table_name}'")
+            conn.isolation_level = None
+            for pragma, value in self.load_pragmas.items():
+                conn.execute(f"PRAGMA {pragma} = {value}")
+
+            conn.execute("BEGIN")
+            if replace:
+                conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table_name}" ({", ".join(columns_def)})'
+            )
+
+            rows = iter(rows)
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+                conn.executemany(insert_sql, batch)
+                total_rows += len(batch)
+
+            conn.execute("COMMIT")
+            logger.info(f"Inserted {total_rows} rows into table '{table_name}'")
+            return total_rows
         except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
             logger.error(f"SQLite error inserting data: {e}")
             raise
         except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
             logger.error(f"Unexpected error inserting data: {e}")
             raise
+        finally:
+            if not self.keep_journal_mode:
+                conn.execute(f"PRAGMA journal_mode = {previous_journal_mode}")
+            conn.close()
+
+    def upsert(
+        self,
+        table_name: str,
+        chunks: Iterable[pd.DataFrame],
+        column_types: Dict[str, str],
+        key_columns: List[str],
+    ) -> Dict[str, int]:
+        """Merge new data into a table keyed on key_columns.
+
+        The data is bulk loaded into a staging table and merged with
+        INSERT ... ON CONFLICT DO UPDATE; the update only fires when a non-key
+        value actually differs, so unchanged rows are not rewritten. When the
+        data repeats a key, its last row wins. The target table is created if
+        missing, and new columns are added to it.
+
+        Returns:
+            Counts of inserted, updated and unchanged keys
+        """
+        missing_keys = [column for column in key_columns if column not in column_types]
+        if missing_keys:
+            raise ValueError(f"Upsert key columns {missing_keys} not in the data")
+
+        staging_table = f"{table_name}__staging"
+        staged_rows = self.bulk_load(staging_table, chunks, column_types, replace=True)
+
+        columns = list(column_types)
+        value_columns = [column for column in columns if column not in key_columns]
+        key_list = ", ".join(map(quote_identifier, key_columns))
+        key_match = " AND ".join(
+            f"t.{quote_identifier(c)} IS s.{quote_identifier(c)}" for c in key_columns
+        )
+        differs = (
+            " OR ".join(
+                f"t.{quote_identifier(c)} IS NOT s.{quote_identifier(c)}"
+                for c in value_columns
+            )
+            or "0"
+        )
+
+        conn = self.create_connection()
+        try:
+            with conn:
+                columns_def = ", ".join(
+                    f"{quote_identifier(column)} {data_type}"
+                    for column, data_type in column_types.items()
+                )
+                conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{table_name}" ({columns_def})'
+                )
+                existing = {
+                    row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')
+                }
+                for column in columns:
+                    if column not in existing:
+                        conn.execute(
+                            f'ALTER TABLE "{table_name}" ADD COLUMN '
+                            f"{quote_identifier(column)} {column_types[column]}"
+                        )
+                        logger.info(f"Added column '{column}' to '{table_name}'")
+                # ON CONFLICT needs a unique index on the key
+                conn.execute(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS "pk_{table_name}" '
+                    f'ON "{table_name}" ({key_list})'
+                )
+                # Keep only the last staged row per key, so the counts below
+                # match the rows the merge leaves behind
+                repeated = conn.execute(
+                    f'DELETE FROM "{staging_table}" WHERE rowid NOT IN '
+                    f'(SELECT MAX(rowid) FROM "{staging_table}" GROUP BY {key_list})'
+                ).rowcount
+                if repeated:
+                    logger.info(f"Dropped {repeated} earlier rows of repeated keys")
+                staged_rows -= repeated
+
+                inserted = conn.execute(
+                    f'SELECT COUNT(*) FROM "{staging_table}" s WHERE NOT EXISTS '
+                    f'(SELECT 1 FROM "{table_name}" t WHERE {key_match})'
+                ).fetchone()[0]
+                updated = conn.execute(
+                    f'SELECT COUNT(*) FROM "{staging_table}" s JOIN "{table_name}" t '
+                    f"ON {key_match} WHERE {differs}"
+                ).fetchone()[0]
+
+                column_list = ", ".join(map(quote_identifier, columns))
+                if value_columns:
+                    set_clause = ", ".join(
+                        f"{quote_identifier(c)} = excluded.{quote_identifier(c)}"
+                        for c in value_columns
+                    )
+                    update_when = " OR ".join(
+                        f"{quote_identifier(table_name)}.{quote_identifier(c)} "
+                        f"IS NOT excluded.{quote_identifier(c)}"
+                        for c in value_columns
+                    )
+                    conflict = f"DO UPDATE SET {set_clause} WHERE {update_when}"
+                else:
+                    conflict = "DO NOTHING"
+                # "WHERE true" disambiguates ON CONFLICT after INSERT ... SELECT
+                conn.execute(
+                    f'INSERT INTO "{table_name}" ({column_list}) '
+                    f'SELECT {column_list} FROM "{staging_table}" WHERE true '
+                    f"ON CONFLICT ({key_list}) {conflict}"
+                )
+                conn.execute(f'DROP TABLE "{staging_table}"')
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error upserting data: {e}")
+            raise
+        finally:
+            conn.close()
+
+        summary = {
+            "inserted": inserted,
+            "updated": updated,
+            "unchanged": staged_rows - inserted - updated,
+        }
+        logger.info(
+            f"Upserted {staged_rows} rows into '{table_name}': "
+            f"{summary['inserted']} inserted, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged"
+        )
+        return summary
+
+    def create_indexes(
+        self, table_name: str, indexes: List[List[str]], analyze: bool = True
+    ) -> None:
+        """Create indexes on a loaded table and refresh planner statistics.
+
+        Meant to run after a bulk load, since maintaining indexes during the
+        inserts is much slower than building them once at the end.
+        """
+        conn = self.create_connection()
+        try:
+            with conn:
+                for columns in indexes:
+                    index_name = "idx_" + "_".join(
+                        re.sub(r"\W+", "_", name) for name in [table_name, *columns]
+                    )
+                    quoted_columns = ", ".join(f'"{column}"' for column in columns)
+                    conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{index_name}" '
+                        f'ON "{table_name}" ({quoted_columns})'
+                    )
+                    logger.info(f"Created index '{index_name}' on {columns}")
+            if analyze:
+                conn.execute(f'ANALYZE "{table_name}"')
+                conn.commit()
+                logger.info(f"Analyzed table '{table_name}'")
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error creating indexes: {e}")
+            raise
+        finally:
+            conn.close()
 
 
 class DBLoader:
     """Main class that orchestrates the loading process."""
 
-    def __init__(self, config_path: Optional[str] = None):
-        """Initialize with optional config path."""
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        indexes: Optional[List[List[str]]] = None,
+        upsert_key: Optional[List[str]] = None,
+        fast_path: Optional[bool] = None,
+    ):
+        """Initialize with optional config path, extra indexes, upsert key and
+        fast path setting (default: database.fast_path in the config)."""
         self.config_path = config_path
+        self.extra_indexes = indexes or []
+        self.upsert_key = upsert_key
+        self.fast_path = fast_path
         self.config = None
         if config_path:
             try:
@@ -173,19 +878,360 @@ class DBLoader:
                 )
                 raise
 
-    def load_csv_to_db(self, csv_path: str, db_path: str, table_name: str) -> None:
-        """Load CSV data into SQLite database with inferred schema."""
-        try:
-            # Load data
-            df = DataLoader.load_csv(csv_path)
+    def create_db_manager(self, db_path: str) -> DatabaseManager:
+        """Create a DatabaseManager using the configured load PRAGMAs."""
+        load_pragmas = (self.config or {}).get("database", {}).get("load_pragmas")
+        return DatabaseManager(db_path, load_pragmas)
+
+    def get_upsert_key(self) -> Optional[List[str]]:
+        """Return the key columns if the table should be upserted, else None."""
+        if self.upsert_key:
+            return self.upsert_key
+        database = (self.config or {}).get("database", {})
+        if database.get("load_mode", "replace") != "upsert":
+            return None
+        key = database.get("primary_key")
+        if not key:
+            raise ValueError(
+                "database.load_mode 'upsert' requires database.primary_key"
+            )
+        return [key] if isinstance(key, str) else list(key)
+
+    def write_table(
+        self,
+        db_path: str,
+        table_name: str,
+        chunks: Iterable[pd.DataFrame],
+        column_types: Dict[str, str],
+    ) -> int:
+        """Replace or upsert the table with the given chunks, then build indexes.
+
+        Returns:
+            Number of rows loaded
+        """
+        db_manager = self.create_db_manager(db_path)
+        upsert_key = self.get_upsert_key()
+        with span("load_table") as stage:
+            if upsert_key:
+                summary = db_manager.upsert(
+                    table_name, chunks, column_types, upsert_key
+                )
+                total_rows = sum(summary.values())
+            else:
+                total_rows = db_manager.bulk_load(
+                    table_name, chunks, column_types, replace=True
+                )
+            stage.rows_out = total_rows
+        with span("build_indexes", rows_in=total_rows):
+            self.build_indexes(db_manager, table_name, column_types)
+        return total_rows
+
+    def get_index_specs(self) -> List[List[str]]:
+        """Return the column lists to index after loading.
+
+        Combines database.indexes from the config (each entry a column name or
+        a list of columns), the join identifier of file A unless
+        database.index_join_column is false, and any indexes passed in.
+        """
+        config = self.config or {}
+        database = config.get("database", {})
+        specs: List[List[str]] = []
+
+        if database.get("index_join_column", True):
+            join_column = config.get("files", {}).get("a", {}).get("id_column")
+            if join_column:
+                specs.append([join_column])
+
+        for entry in list(database.get("indexes") or []) + self.extra_indexes:
+            columns = [entry] if isinstance(entry, str) else list(entry)
+            if columns not in specs:
+                specs.append(columns)
+        return specs
+
+    def build_indexes(
+        self, db_manager: DatabaseManager, table_name: str, columns: Iterable[str]
+    ) -> None:
+        """Create the configured indexes that apply to the loaded columns."""
+        columns = set(columns)
+        indexes = []
+        for spec in self.get_index_specs():
+            missing = [column for column in spec if column not in columns]
+            if missing:
+                logger.warning(
+                    f"Skipping index on {spec}: columns {missing} not in '{table_name}'"
+                )
+            else:
+                indexes.append(spec)
+        db_manager.create_indexes(table_name, indexes)
+
+    def get_db_settings(self) -> Tuple[str, str]:
+        """Return the configured database path and table name."""
+        database = (self.config or {}).get("database", {})
+        return (
+            database.get("path", "output.db"),
+            database.get("table_name", "joined_data"),
+        )
 
-            # Infer schema
+    def load_dataframe_to_db(
+        self, df: pd.DataFrame, db_path: str, table_name: str
+    ) -> None:
+        """Load an in-memory DataFrame into SQLite with inferred schema."""
+        # Infer schema
+        with span("infer_schema", rows_in=len(df)):
             column_types = SchemaInferencer.infer_column_types(df)
 
-            # Create and load database
-            db_manager = DatabaseManager(db_path)
-            db_manager.create_table(table_name, column_types)
-            db_manager.insert_data(table_name, df)
+        # Create the table from the inferred schema and bulk load it
+        self.write_table(db_path, table_name, [df], column_types)
+
+    def load_chunks_to_db(
+        self, chunks: Iterable[pd.DataFrame], db_path: str, table_name: str
+    ) -> int:
+        """Load a stream of DataFrames into one table, replacing it first.
+
+        Every chunk must have the same dtypes, like the buckets of the
+        out-of-core join (see file_joiner.iter_out_of_core); the column types
+        come from the first chunk as for an in-memory DataFrame, and the whole
+        stream is loaded in one transaction.
+        """
+        chunks = iter(chunks)
+        first = next(chunks, None)
+        if first is None:
+            logger.warning(f"No data to load into table '{table_name}'")
+            return 0
+
+        with span("infer_schema", rows_in=len(first)):
+            column_types = SchemaInferencer.infer_column_types(first)
+        total_rows = self.write_table(
+            db_path, table_name, itertools.chain([first], chunks), column_types
+        )
+        logger.info(f"Loaded {total_rows} rows into table '{table_name}'")
+        return total_rows
+
+    def stream_csv_to_db(
+        self,
+        csv_path: str,
+        db_path: str,
+        table_name: str,
+        chunksize: int,
+        sample_rows: int = 10000,
+        columns: Optional[List[str]] = None,
+        file_format: Optional[str] = None,
+    ) -> int:
+        """Load a file chunk by chunk so peak memory is one chunk.
+
+        For CSV files the schema is inferred from a sample of the file; the
+        chunks are read as text and converted to the inferred kinds (see
+        convert_text_column), so every chunk gets the same types and a value
+        the sample missed cannot abort the load. Parquet and Feather files
+        carry their own types, read from their schema.
+        All chunks are appended in a single transaction, logging rows/sec as
+        it goes.
+        """
+        with span("infer_schema"):
+            file_format = DataLoader.detect_format(csv_path, file_format)
+            if file_format == "csv":
+                column_types, kinds = SchemaInferencer.infer_from_file(
+                    csv_path, sample_rows=sample_rows
+                )
+                if columns:
+                    column_types = {c: column_types[c] for c in columns}
+                chunks = (
+                    convert_text_frame(chunk, kinds)
+                    for chunk in DataLoader.iter_csv(
+                        csv_path,
+                        chunksize,
+                        dtype=str,
+                        columns=columns,
+                        keep_default_na=False,
+                    )
+                )
+            else:
+                empty = DataLoader.read_schema(csv_path, columns, file_format)
+                column_types = SchemaInferencer.infer_column_types(empty)
+                chunks = DataLoader.iter_csv(
+                    csv_path, chunksize, columns=columns, file_format=file_format
+                )
+
+        chunks = self._log_progress(chunks)
+        return self.write_table(db_path, table_name, chunks, column_types)
+
+    def load_joined_file(
+        self, file_path: str, db_path: str, table_name: str, kinds: Dict[str, str]
+    ) -> int:
+        """Reload a joined file written by the pipeline into the table it loaded.
+
+        Parquet and Feather files keep the dtypes of the joined DataFrames. A
+        CSV file is read as text and converted to kinds, the value kinds the
+        joined data had when it was written (see kinds_from_dtypes), instead
+        of inferring its types again. database.columns and database.chunksize
+        apply as for process_from_config.
+
+        Returns:
+            Number of rows loaded
+        """
+        config = self.config or {}
+        database = config.get("database", {})
+        columns = database.get("columns")
+        chunksize = database.get("chunksize")
+        file_format = DataLoader.detect_format(file_path, config.get("output_format"))
+
+        if file_format == "csv":
+            chunks = DataLoader.iter_csv(
+                file_path,
+                chunksize,
+                dtype=str,
+                columns=columns,
+                keep_default_na=False,
+            )
+            if not chunksize:
+                chunks = [chunks]
+            chunks = (convert_text_frame(chunk, kinds) for chunk in chunks)
+        elif chunksize:
+            chunks = DataLoader.iter_csv(
+                file_path, chunksize, columns=columns, file_format=file_format
+            )
+        else:
+            chunks = [
+                DataLoader.load_csv(file_path, columns=columns, file_format=file_format)
+            ]
+        return self.load_chunks_to_db(self._log_progress(chunks), db_path, table_name)
+
+    @staticmethod
+    def _log_progress(chunks: Iterable[pd.DataFrame]) -> Iterable[pd.DataFrame]:
+        """Pass chunks through, logging the running row count and rows/sec."""
+        start = time.perf_counter()
+        total_rows = 0
+        for chunk in chunks:
+            yield chunk
+            total_rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            rate = total_rows / elapsed if elapsed > 0 else float("inf")
+            logger.info(f"Loaded {total_rows} rows ({rate:,.0f} rows/sec)")
+
+    def use_fast_path(self, csv_path: str, file_format: Optional[str] = None) -> bool:
+        """Return True if the fast path is enabled and csv_path is small enough.
+
+        The fast path is opt-in because it types columns with the sampled
+        inference rules (see load_small_csv) rather than from pandas dtypes,
+        so the same file could otherwise get a different table depending on
+        its size. Upserts always go through pandas.
+        """
+        database = (self.config or {}).get("database", {})
+        enabled = self.fast_path
+        if enabled is None:
+            enabled = database.get("fast_path", False)
+        max_bytes = database.get("fast_path_max_bytes", FAST_PATH_MAX_BYTES)
+        return (
+            enabled
+            and DataLoader.detect_format(csv_path, file_format) == "csv"
+            and os.path.exists(csv_path)
+            and os.path.getsize(csv_path) <= max_bytes
+            and not self.get_upsert_key()
+        )
+
+    def load_small_csv(
+        self,
+        csv_path: str,
+        db_path: str,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+    ) -> int:
+        """Load a small CSV file with the csv module and sqlite3 only.
+
+        Column types are inferred from every row with the same rules as the
+        sampled inference used for streaming loads, and the table is replaced.
+        These differ from the pandas dtypes of the default path: codes with
+        leading zeros such as "007" stay TEXT, and integer columns with blanks
+        stay INTEGER rather than REAL.
+
+        Returns:
+            Number of rows loaded
+        """
+        with span("read_file") as stage:
+            with open(csv_path, "r", newline="", encoding="utf-8-sig") as file:
+                reader = csv.reader(file)
+                header = next(reader, None)
+                if not header:
+                    logger.error(f"CSV file is empty: {csv_path}")
+                    raise ValueError(f"CSV file is empty: {csv_path}")
+                rows = [row for row in reader if row]
+            stage.rows_out = len(rows)
+
+        width = len(header)
+        for line, row in enumerate(rows, start=2):
+            if len(row) > width:
+                raise ValueError(
+                    f"Expected {width} fields in line {line} of {csv_path}, "
+                    f"saw {len(row)}"
+                )
+            if len(row) < width:
+                row.extend([""] * (width - len(row)))
+
+        with span("infer_schema", rows_in=len(rows)):
+            kinds = SchemaInferencer.infer_kinds(header, rows)
+            selected = columns or header
+            positions = [header.index(column) for column in selected]
+            column_types = {
+                column: SchemaInferencer._KIND_TYPES[kinds[column]]
+                for column in selected
+            }
+            logger.info(f"Inferred types for {len(column_types)} columns")
+
+        values = zip(
+            *(
+                convert_raw_values([row[i] for row in rows], kinds[column])
+                for column, i in zip(selected, positions)
+            )
+        )
+        db_manager = self.create_db_manager(db_path)
+        with span("load_table", rows_in=len(rows)) as stage:
+            total_rows = db_manager.bulk_load_rows(table_name, values, column_types)
+            stage.rows_out = total_rows
+        with span("build_indexes", rows_in=total_rows):
+            self.build_indexes(db_manager, table_name, column_types)
+        return total_rows
+
+    def load_csv_to_db(
+        self,
+        csv_path: str,
+        db_path: str,
+        table_name: str,
+        chunksize: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        file_format: Optional[str] = None,
+    ) -> None:
+        """Load CSV (or Parquet/Feather) data into SQLite database with inferred schema.
+
+        If chunksize is given the file is streamed in chunks instead of being
+        loaded into memory at once. Otherwise small CSV files can be loaded
+        without pandas (see use_fast_path). If columns is given only those are loaded.
+        The format is detected from the extension unless file_format is given.
+        """
+        try:
+            if not chunksize and self.use_fast_path(csv_path, file_format):
+                self.load_small_csv(csv_path, db_path, table_name, columns)
+            elif chunksize:
+                sample_rows = (
+                    (self.config or {}).get("database", {}).get("sample_rows", 10000)
+                )
+                self.stream_csv_to_db(
+                    csv_path,
+                    db_path,
+                    table_name,
+                    chunksize,
+                    sample_rows,
+                    columns,
+                    file_format,
+                )
+            else:
+                # Load data
+                with span("read_file") as stage:
+                    df = DataLoader.load_csv(
+                        csv_path, columns=columns, file_format=file_format
+                    )
+                    stage.rows_out = len(df)
+
+                self.load_dataframe_to_db(df, db_path, table_name)
 
             logger.info(
                 f"Successfully loaded {csv_path} into {db_path} as table '{table_name}'"
@@ -206,35 +1252,222 @@ class DBLoader:
 
         try:
             csv_path = self.config.get("output_path", "joined_output.csv")
-            db_path = self.config.get("database", {}).get("path", "output.db")
-            table_name = self.config.get("database", {}).get(
-                "table_name", "joined_data"
-            )
+            db_path, table_name = self.get_db_settings()
 
             # Make the file path absolute if it's not already
             if not os.path.isabs(csv_path):
                 csv_path = os.path.abspath(csv_path)
 
-            self.load_csv_to_db(csv_path, db_path, table_name)
+            database = self.config.get("database", {})
+            self.load_csv_to_db(
+                csv_path,
+                db_path,
+                table_name,
+                database.get("chunksize"),
+                database.get("columns"),
+                # The joined file is in output_format whatever its extension
+                self.config.get("output_format"),
+            )
         except Exception as e:
             logger.error(f"Error processing from config: {e}")
             sys.exit(1)
 
 
-def create_integrated_pipeline(config_path: str) -> None:
-    """Run the complete data pipeline: join files and load to database."""
+# Config keys that affect the joined output
+JOIN_CONFIG_KEYS = [
+    "files",
+    "output_format",
+    "columns_from_c",
+    "join_type",
+    "join_type_c",
+    "output_path",
+    "keep_only_a_identifier",
+    "redundant_fields",
+    "csv_engine",
+    "out_of_core",
+]
+
+
+class StageCache:
+    """Remember what each pipeline stage was last run on, to skip unchanged reruns.
+
+    A stage key combines the size and mtime (and optionally a content hash) of
+    the stage's input files with its configuration settings. A stage is fresh
+    when its key matches the recorded one and its outputs are still exactly as
+    the stage left them.
+    """
+
+    def __init__(self, cache_path: str, content_hash: bool = False):
+        """Load the cache file if it exists."""
+        self.cache_path = cache_path
+        self.content_hash = content_hash
+        self.entries: Dict[str, Any] = {}
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r") as file:
+                    self.entries = json.load(file)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable stage cache {cache_path}: {e}")
+
+    @staticmethod
+    def file_state(path: str, content_hash: bool = False) -> Optional[Dict[str, Any]]:
+        """Return the size, mtime and optional content hash of a file."""
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        state: Dict[str, Any] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if content_hash:
+            digest = hashlib.blake2b(digest_size=16)
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(block)
+            state["blake2b"] = digest.hexdigest()
+        return state
+
+    def stage_key(self, input_paths: List[str], settings: Any) -> str:
+        """Fingerprint a stage from its input files and settings."""
+        payload = {
+            "inputs": {
+                os.path.abspath(path): self.file_state(path, self.content_hash)
+                for path in input_paths
+            },
+            "settings": settings,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def is_fresh(self, stage: str, key: str) -> bool:
+        """Return True if the stage ran with this key and its outputs are intact."""
+        entry = self.entries.get(stage)
+        if not entry or entry.get("key") != key:
+            return False
+        return all(
+            self.file_state(path) == state for path, state in entry["outputs"].items()
+        )
+
+    def record(
+        self,
+        stage: str,
+        key: str,
+        output_paths: List[str],
+        details: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Record a successful stage run (with optional details) and save the cache."""
+        self.entries[stage] = {
+            "key": key,
+            "outputs": {
+                os.path.abspath(path): self.file_state(path) for path in output_paths
+            },
+            **(details or {}),
+        }
+        with open(self.cache_path, "w") as file:
+            json.dump(self.entries, file, indent=2)
+
+    def invalidate(self, stage: str) -> None:
+        """Forget a stage, e.g. after it failed part-way."""
+        self.entries.pop(stage, None)
+
+
+def create_integrated_pipeline(
+    config_path: str,
+    write_csv: Optional[bool] = None,
+    indexes: Optional[List[List[str]]] = None,
+    upsert_key: Optional[List[str]] = None,
+    force: bool = False,
+) -> None:
+    """Run the complete data pipeline: join files and load to database.
+
+    The joined data is handed to the database loader directly instead of being
+    re-read from output_path, so the pipeline parses the inputs once. Writing
+    the joined CSV is controlled by write_csv (default: the write_joined_csv
+    config setting, itself defaulting to true).
+
+    Unless force is set or the cache is disabled (cache.enabled: false), stages
+    whose inputs and settings are unchanged since the last run are skipped:
+    nothing runs if the database is up to date, and only the load runs if the
+    joined CSV is. The value kinds of the joined data are recorded with the
+    join, so that load types the columns exactly like a full run (see
+    DBLoader.load_joined_file).
+    """
     try:
-        # First, import and run the file_joiner
-        from file_joiner import join_files
+        # First, import the file_joiner
+        from file_joiner import join_files, iter_out_of_core
+
+        loader = DBLoader(config_path, indexes=indexes, upsert_key=upsert_key)
+        config = loader.config
+        db_path, table_name = loader.get_db_settings()
+        columns = (config.get("database") or {}).get("columns")
+        output_path = config.get("output_path", "joined_output.csv")
+        if write_csv is None:
+            write_csv = config.get("write_joined_csv", True)
+
+        cache_config = config.get("cache") or {}
+        use_cache = cache_config.get("enabled", True) and not force
+        cache = StageCache(
+            cache_config.get("path", output_path + ".stage_cache.json"),
+            content_hash=cache_config.get("content_hash", False),
+        )
+        input_paths = [config["files"][name]["path"] for name in ("a", "b", "c")]
+        join_key = cache.stage_key(
+            input_paths, {key: config.get(key) for key in JOIN_CONFIG_KEYS}
+        )
+        load_key = cache.stage_key(
+            [],
+            {
+                "join": join_key,
+                "database": config.get("database"),
+                "indexes": loader.extra_indexes,
+                "upsert_key": loader.upsert_key,
+            },
+        )
+
+        join_fresh = use_cache and cache.is_fresh("join", join_key)
+        # A join recorded without its kinds cannot be reloaded like a full run
+        join_kinds = cache.entries["join"].get("kinds") if join_fresh else None
+        join_fresh = join_kinds is not None
+        if (
+            use_cache
+            and cache.is_fresh("load", load_key)
+            and (join_fresh or not write_csv)
+        ):
+            logger.info("Inputs and configuration unchanged; nothing to do")
+            return
+
+        cache.invalidate("load")
 
-        logger.info("Running file_joiner to create the joined CSV file...")
+        if join_fresh:
+            logger.info(f"Joined data in {output_path} is up to date; skipping join")
+            loader.load_joined_file(output_path, db_path, table_name, join_kinds)
+        elif (config.get("out_of_core") or {}).get("enabled", False):
+            # Stream joined buckets straight into the table
+            logger.info(
+                "Running out-of-core join and loading buckets to the database..."
+            )
+            chunks = iter_out_of_core(config, output_path if write_csv else None)
+            # Every bucket has the same dtypes
+            first = next(chunks)
+            join_kinds = SchemaInferencer.kinds_from_dtypes(first)
+            chunks = itertools.chain([first], chunks)
+            if columns:
+                chunks = (chunk[columns] for chunk in chunks)
+            loader.load_chunks_to_db(chunks, db_path, table_name)
+        else:
+            logger.info("Running file_joiner to join the input files...")
+            final_df = join_files(
+                config_path, out_of_core=False, write_output=write_csv
+            )
+            join_kinds = SchemaInferencer.kinds_from_dtypes(final_df)
+            if columns:
+                final_df = final_df[columns]
 
-        join_files(config_path)
+            logger.info("Loading the joined data to the database...")
+            loader.load_dataframe_to_db(final_df, db_path, table_name)
 
-        # Then, load the CSV to the database
-        logger.info("Loading the joined CSV file to the database...")
-        loader = DBLoader(config_path)
-        loader.process_from_config()
+        if write_csv and not join_fresh:
+            cache.record("join", join_key, [output_path], {"kinds": join_kinds})
+        elif not write_csv:
+            cache.invalidate("join")
+        cache.record("load", load_key, [db_path])
 
         logger.info("Complete data pipeline executed successfully!")
     except ImportError:
@@ -253,31 +1486,92 @@ def main():
         description="Load CSV file into SQLite database with schema inference"
     )
     parser.add_argument("--config", help="Path to YAML configuration file")
-    parser.add_argument("--csv", help="Path to CSV file to load")
+    parser.add_argument("--csv", help="Path to CSV (or .parquet/.feather) file to load")
     parser.add_argument("--db", default="output.db", help="Path to SQLite database")
     parser.add_argument(
         "--table", default="joined_data", help="Table name to create/replace"
     )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream the CSV into the database in chunks of N rows",
+    )
+    parser.add_argument(
+        "--index",
+        action="append",
+        default=[],
+        metavar="COL[,COL...]",
+        help="Create an index on these columns after loading (repeatable)",
+    )
+    parser.add_argument(
+        "--upsert-key",
+        metavar="COL[,COL...]",
+        help="Upsert into the table keyed on these columns instead of replacing it",
+    )
+    parser.add_argument(
+        "--fast-path",
+        action="store_true",
+        default=None,
+        help="Load small CSV files with the csv module instead of pandas "
+        "(columns are typed by value sampling rules, not pandas dtypes)",
+    )
     parser.add_argument(
         "--run-pipeline",
         action="store_true",
         help="Run the complete pipeline (file joining and database loading)",
     )
+    parser.add_argument(
+        "--no-csv",
+        action="store_true",
+        help="With --run-pipeline, do not write the intermediate joined CSV",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="With --run-pipeline, rerun every stage even if nothing changed",
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar="TRACE.json",
+        help="Trace memory per stage and write a JSON trace of the stages here",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        help="Dump a cProfile .prof file per stage into this directory",
+    )
 
     args = parser.parse_args()
+    indexes = [spec.split(",") for spec in args.index]
+    upsert_key = args.upsert_key.split(",") if args.upsert_key else None
+    PROFILER.configure(trace_memory=bool(args.profile), profile_dir=args.profile_dir)
 
     try:
         if args.run_pipeline and args.config:
             # Run the full pipeline
-            create_integrated_pipeline(args.config)
+            create_integrated_pipeline(
+                args.config,
+                write_csv=False if args.no_csv else None,
+                indexes=indexes,
+                upsert_key=upsert_key,
+                force=args.force,
+            )
         elif args.config:
             # Process using configuration file
-            loader = DBLoader(args.config)
+            loader = DBLoader(
+                args.config,
+                indexes=indexes,
+                upsert_key=upsert_key,
+                fast_path=args.fast_path,
+            )
             loader.process_from_config()
         elif args.csv:
             # Process using command line arguments
-            loader = DBLoader()
-            loader.load_csv_to_db(args.csv, args.db, args.table)
+            loader = DBLoader(
+                indexes=indexes, upsert_key=upsert_key, fast_path=args.fast_path
+            )
+            loader.load_csv_to_db(args.csv, args.db, args.table, args.chunksize)
         else:
             logger.error("Either --config or --csv must be provided")
             parser.print_help()
@@ -285,6 +1579,12 @@ def main():
     except Exception as e:
         logger.error(f"Error in main: {e}")
         sys.exit(1)
+    finally:
+        if PROFILER.spans:
+            logger.info("Stage summary:\n" + PROFILER.format_summary())
+        if args.profile:
+            PROFILER.write_trace(args.profile)
+            logger.info(f"Stage trace saved to {args.profile}")
 
 
 if __name__ == "__main__":
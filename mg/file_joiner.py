@@ -1,71 +1,139 @@
-import pandas as pd
-import yaml
 import argparse
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import PROFILER, span
+
+# pandas and yaml are imported where they are used so the CLI starts quickly
 
 
 def load_config(config_path):
     """Load configuration from YAML file."""
+    import yaml
+
     with open(config_path, "r") as file:
         return yaml.safe_load(file)
 
 
-def join_files(config_path):
-    """Join files based on configuration."""
-    # Load configuration
-    config = load_config(config_path)
+def _declares_text(dtype):
+    """Return True if a read_csv dtype argument makes any column text (str, object)."""
+    from pandas.api.types import is_string_dtype, pandas_dtype
 
-    # Extract configuration details
-    file_a_path = config["files"]["a"]["path"]
-    file_b_path = config["files"]["b"]["path"]
-    file_c_path = config["files"]["c"]["path"]
+    if dtype is None:
+        return False
+    types = dtype.values() if isinstance(dtype, dict) else [dtype]
+    return any(is_string_dtype(pandas_dtype(typ)) for typ in types)
 
-    file_a_id = config["files"]["a"]["id_column"]
-    file_b_id = config["files"]["b"]["id_column"]
-    file_c_id = config["files"]["c"]["id_column"]
 
-    # Columns to select from file C
-    c_columns = [file_c_id] + config.get("columns_from_c", [])
+def read_input(file_config, default_usecols=None, engine=None, **overrides):
+    """Read one input file using its configured usecols and dtype.
 
-    # Read data
-    df_a = pd.read_csv(file_a_path)
-    df_b = pd.read_csv(file_b_path)
-    df_c = pd.read_csv(file_c_path)
+    The pyarrow engine parses values before applying dtype, so columns declared
+    as text would lose leading zeros ("00821" -> "821"); files that declare
+    any are read with the default engine instead.
 
-    # Select only needed columns from C
-    df_c = df_c[c_columns]
+    Args:
+        file_config: The files.<x> entry of the configuration
+        default_usecols: Columns to read when the entry has no usecols
+        engine: Optional pandas CSV engine (e.g. "pyarrow")
+        **overrides: Extra pd.read_csv arguments, taking precedence over the config
+
+    Returns:
+        DataFrame with the selected columns (or a chunk iterator if chunksize is given)
+    """
+    import pandas as pd
+
+    usecols = file_config.get("usecols", default_usecols)
+    if usecols is not None and file_config["id_column"] not in usecols:
+        # The identifier is always needed for the join
+        usecols = [file_config["id_column"]] + list(usecols)
+
+    read_kwargs = {"usecols": usecols, "dtype": file_config.get("dtype")}
+    read_kwargs.update(overrides)
+    if engine == "pyarrow" and _declares_text(read_kwargs["dtype"]):
+        print(
+            f"Reading {file_config['path']} with the default CSV engine, since "
+            f"pyarrow would drop leading zeros from its text columns"
+        )
+    elif engine:
+        read_kwargs["engine"] = engine
+
+    return pd.read_csv(file_config["path"], **read_kwargs)
+
+
+def load_inputs(config):
+    """Read files A, B and C concurrently.
+
+    Returns:
+        Tuple of (df_a, df_b, df_c)
+    """
+    engine = config.get("csv_engine")
+    c_config = config["files"]["c"]
+    c_columns = [c_config["id_column"]] + config.get("columns_from_c", [])
+
+    with span("read_inputs") as stage, ThreadPoolExecutor(max_workers=3) as pool:
+        future_a = pool.submit(read_input, config["files"]["a"], None, engine)
+        future_b = pool.submit(read_input, config["files"]["b"], None, engine)
+        future_c = pool.submit(read_input, c_config, c_columns, engine)
+        frames = future_a.result(), future_b.result(), future_c.result()
+        stage.rows_out = sum(len(df) for df in frames)
+        return frames
+
+
+def merge_frames(df_a, df_b, df_c, config):
+    """Join A with B, then the result with C, as configured."""
+    import pandas as pd
+
+    file_a_id = config["files"]["a"]["id_column"]
+    file_b_id = config["files"]["b"]["id_column"]
+    file_c_id = config["files"]["c"]["id_column"]
 
     # Join A and B
-    merged_ab = pd.merge(
-        df_a,
-        df_b,
-        left_on=file_a_id,
-        right_on=file_b_id,
-        how=config.get("join_type", "inner"),
-        suffixes=(
-            "",
-            "_b",
-        ),  # Keep A's columns without suffix, add _b to B's duplicates
-    )
+    with span("merge_ab", rows_in=len(df_a) + len(df_b)) as stage:
+        merged_ab = pd.merge(
+            df_a,
+            df_b,
+            left_on=file_a_id,
+            right_on=file_b_id,
+            how=config.get("join_type", "inner"),
+            suffixes=(
+                "",
+                "_b",
+            ),  # Keep A's columns without suffix, add _b to B's duplicates
+        )
+        stage.rows_out = len(merged_ab)
 
     # Join with C
-    final_df = pd.merge(
-        merged_ab,
-        df_c,
-        left_on=file_a_id,  # Using A's ID as the join key
-        right_on=file_c_id,
-        how=config.get("join_type_c", "left"),
-        suffixes=(
-            "",
-            "_c",
-        ),  # Keep existing columns without suffix, add _c to C's duplicates
-    )
+    with span("merge_c", rows_in=len(merged_ab) + len(df_c)) as stage:
+        merged = pd.merge(
+            merged_ab,
+            df_c,
+            left_on=file_a_id,  # Using A's ID as the join key
+            right_on=file_c_id,
+            how=config.get("join_type_c", "left"),
+            suffixes=(
+                "",
+                "_c",
+            ),  # Keep existing columns without suffix, add _c to C's duplicates
+        )
+        stage.rows_out = len(merged)
+    return merged
+
+
+def clean_columns(final_df, config, verbose=True):
+    """Drop the B/C identifiers and redundant fields as configured."""
+    file_b_id = config["files"]["b"]["id_column"]
+    file_c_id = config["files"]["c"]["id_column"]
 
     # Check if we should keep only the identifier from dataset A
     if config.get("keep_only_a_identifier", False):
         # Drop the identifier columns from datasets B and C
         cols_to_drop = [file_b_id, file_c_id]
         final_df = final_df.drop(columns=cols_to_drop)
-        print("Keeping only the identifier from dataset A")
+        if verbose:
+            print("Keeping only the identifier from dataset A")
 
     # Handle redundant fields
     redundant_fields = config.get("redundant_fields", [])
@@ -82,12 +150,272 @@ def join_files(config_path):
             # Drop the duplicate columns
             if duplicate_cols:
                 final_df = final_df.drop(columns=duplicate_cols)
-                print(f"Removed redundant columns for '{column}': {duplicate_cols}")
+                if verbose:
+                    print(f"Removed redundant columns for '{column}': {duplicate_cols}")
 
-    # Save to output file
+    return final_df
+
+
+OUTPUT_FORMATS = ("csv", "parquet", "feather")
+
+
+class OutputWriter:
+    """Write joined DataFrames to output_path as CSV, Parquet or Feather.
+
+    DataFrames can be written one after another (e.g. one per bucket); the
+    columnar formats append them as row groups / record batches of one file.
+    Parquet and Feather need pyarrow.
+    """
+
+    def __init__(self, output_path, output_format="csv"):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unknown output_format '{output_format}', "
+                f"expected one of {OUTPUT_FORMATS}"
+            )
+        self.output_path = output_path
+        self.output_format = output_format
+        self._handle = None
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        if self.output_format == "csv":
+            header = self._handle is None
+            if header:
+                self._handle = open(self.output_path, "w", newline="", encoding="utf-8")
+            df.to_csv(self._handle, index=False, header=header)
+            return
+
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            # Columns without values (an empty bucket, or no join matches)
+            # come through as null; store them as text so later frames fit
+            self._schema = pa.schema(
+                [
+                    pa.field(field.name, pa.string())
+                    if pa.types.is_null(field.type)
+                    else field
+                    for field in table.schema
+                ],
+                metadata=table.schema.metadata,
+            )
+            if self.output_format == "parquet":
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(self.output_path, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(self.output_path, self._schema)
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _bucket_path(bucket_dir, name, bucket):
+    return os.path.join(bucket_dir, f"{name}-{bucket:05d}.csv")
+
+
+def partition_input(file_config, name, bucket_dir, partitions, chunksize, usecols=None):
+    """Hash-partition one input file on its identifier into bucket files.
+
+    Values are read and spilled as text, so every bucket sees the same
+    representation of the identifier and of the other columns.
+
+    Returns:
+        List of the columns written to the buckets
+    """
+    import pandas as pd
+
+    id_column = file_config["id_column"]
+    reader = read_input(
+        file_config,
+        usecols,
+        chunksize=chunksize,
+        dtype=str,
+        keep_default_na=False,
+    )
+
+    columns = None
+    for chunk in reader:
+        columns = chunk.columns.tolist()
+        hashes = pd.util.hash_pandas_object(chunk[id_column], index=False)
+        buckets = (hashes % partitions).to_numpy()
+        for bucket, part in chunk.groupby(buckets, sort=False):
+            path = _bucket_path(bucket_dir, name, bucket)
+            part.to_csv(path, mode="a", index=False, header=not os.path.exists(path))
+
+    if columns is None:
+        # Empty input: keep its header so the joins still produce the right columns
+        columns = read_input(file_config, usecols, nrows=0).columns.tolist()
+    return columns
+
+
+def _read_bucket(bucket_dir, name, bucket, columns):
+    import pandas as pd
+
+    path = _bucket_path(bucket_dir, name, bucket)
+    if not os.path.exists(path):
+        # Same text dtype as the spilled buckets
+        return pd.DataFrame({col: pd.Series(dtype=str) for col in columns})
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def iter_out_of_core(config, output_path=None):
+    """Join A, B and C bucket by bucket when the inputs do not fit in memory.
+
+    Each input is hash-partitioned on its identifier into N bucket files, so
+    matching identifiers always land in the same bucket. Bucket i of A, B and C
+    is then joined exactly like the in-memory path and spilled as text while
+    the kind of every column is inferred over all the joined rows (with the
+    value rules of db_loader.SchemaInferencer). Finally each joined bucket is
+    read back, converted to those kinds, appended to output_path in the
+    configured output_format, if given, and yielded, so every DataFrame (and
+    the columns of a Parquet or Feather output) has the same dtypes.
+    Memory is bounded by one bucket triple; rows come out grouped by bucket
+    rather than in input order.
+
+    The buckets are read as text, so the dtypes follow the value rules rather
+    than what pandas infers for the in-memory join: codes with leading zeros
+    stay text, and integer columns with blanks stay integer instead of float.
+
+    Configured through the optional out_of_core section (partitions, chunksize,
+    temp_dir).
+    """
+    import pandas as pd
+
+    from db_loader import SchemaInferencer, convert_text_frame
+
+    options = config.get("out_of_core") or {}
+    partitions = int(options.get("partitions", 16))
+    chunksize = int(options.get("chunksize", 100000))
+
+    c_config = config["files"]["c"]
+    c_columns = [c_config["id_column"]] + config.get("columns_from_c", [])
+
+    bucket_dir = tempfile.mkdtemp(prefix="join_", dir=options.get("temp_dir"))
+    writer = None
+    try:
+        with span("partition_inputs"):
+            columns = {
+                "a": partition_input(
+                    config["files"]["a"], "a", bucket_dir, partitions, chunksize
+                ),
+                "b": partition_input(
+                    config["files"]["b"], "b", bucket_dir, partitions, chunksize
+                ),
+                "c": partition_input(
+                    c_config, "c", bucket_dir, partitions, chunksize, c_columns
+                ),
+            }
+        print(f"Partitioned inputs into {partitions} buckets in {bucket_dir}")
+
+        kinds = {}
+        for bucket in range(partitions):
+            with span("read_bucket") as stage:
+                df_a = _read_bucket(bucket_dir, "a", bucket, columns["a"])
+                df_b = _read_bucket(bucket_dir, "b", bucket, columns["b"])
+                df_c = _read_bucket(bucket_dir, "c", bucket, columns["c"])[c_columns]
+                stage.rows_out = len(df_a) + len(df_b) + len(df_c)
+
+            final_df = merge_frames(df_a, df_b, df_c, config)
+            with span("clean_columns", rows_in=len(final_df)) as stage:
+                final_df = clean_columns(final_df, config, verbose=(bucket == 0))
+                stage.rows_out = len(final_df)
+            with span("spill_joined", rows_in=len(final_df)):
+                SchemaInferencer.widen_kinds(kinds, final_df)
+                final_df.to_csv(_bucket_path(bucket_dir, "joined", bucket), index=False)
+        # Columns with only nulls stay text
+        kinds = {column: kind or "text" for column, kind in kinds.items()}
+
+        if output_path:
+            writer = OutputWriter(output_path, config.get("output_format", "csv"))
+
+        for bucket in range(partitions):
+            path = _bucket_path(bucket_dir, "joined", bucket)
+            with span("read_joined") as stage:
+                final_df = pd.read_csv(path, dtype=str, keep_default_na=False)
+                stage.rows_out = len(final_df)
+            os.remove(path)
+            final_df = convert_text_frame(final_df, kinds)
+            if writer is not None:
+                with span("write_output", rows_in=len(final_df)):
+                    writer.write(final_df)
+            yield final_df
+    finally:
+        if writer is not None:
+            writer.close()
+        shutil.rmtree(bucket_dir, ignore_errors=True)
+
+
+def join_out_of_core(config, output_path):
+    """Run the out-of-core join, writing the result to output_path.
+
+    Returns:
+        Number of joined rows written
+    """
+    return sum(len(df) for df in iter_out_of_core(config, output_path))
+
+
+def join_files(config_path, out_of_core=None, write_output=True):
+    """Join files based on configuration.
+
+    Args:
+        config_path: Path to the configuration YAML file
+        out_of_core: Force the out-of-core bucket join on or off. Defaults to
+            out_of_core.enabled in the configuration.
+        write_output: Write the joined data to output_path. Only the in-memory
+            join can skip this, since its result is returned.
+
+    Returns:
+        The joined DataFrame, or None in out-of-core mode (the result only
+        exists in output_path)
+    """
+    # Load configuration
+    config = load_config(config_path)
     output_path = config.get("output_path", "joined_output.csv")
-    final_df.to_csv(output_path, index=False)
-    print(f"Joined data saved to {output_path}")
+
+    if out_of_core is None:
+        out_of_core = (config.get("out_of_core") or {}).get("enabled", False)
+    if out_of_core:
+        total_rows = join_out_of_core(config, output_path)
+        print(f"Joined data saved to {output_path} ({total_rows} rows, out-of-core)")
+        return None
+
+    # Columns to select from file C
+    file_c_id = config["files"]["c"]["id_column"]
+    c_columns = [file_c_id] + config.get("columns_from_c", [])
+
+    # Read data (in parallel, with any configured usecols/dtype)
+    df_a, df_b, df_c = load_inputs(config)
+
+    # Select only needed columns from C
+    df_c = df_c[c_columns]
+
+    # Join A with B, then with C, and tidy up the columns
+    final_df = merge_frames(df_a, df_b, df_c, config)
+    with span("clean_columns", rows_in=len(final_df)) as stage:
+        final_df = clean_columns(final_df, config)
+        stage.rows_out = len(final_df)
+
+    # Save to output file
+    if write_output:
+        with span("write_output", rows_in=len(final_df)), OutputWriter(
+            output_path, config.get("output_format", "csv")
+        ) as writer:
+            writer.write(final_df)
+        print(f"Joined data saved to {output_path}")
 
     return final_df
 
@@ -99,6 +427,28 @@ if __name__ == "__main__":
     parser.add_argument(
         "--config", required=True, help="Path to YAML configuration file"
     )
+    parser.add_argument(
+        "--out-of-core",
+        action="store_true",
+        default=None,
+        help="Join hash-partitioned buckets from disk for inputs larger than memory",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="TRACE.json",
+        help="Trace memory per stage and write a JSON trace of the stages here",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        help="Dump a cProfile .prof file per stage into this directory",
+    )
     args = parser.parse_args()
 
-    join_files(args.config)
+    PROFILER.configure(trace_memory=bool(args.profile), profile_dir=args.profile_dir)
+    try:
+        join_files(args.config, out_of_core=args.out_of_core)
+    finally:
+        print(PROFILER.format_summary())
+        if args.profile:
+            PROFILER.write_trace(args.profile)
+            print(f"Stage trace saved to {args.profile}")
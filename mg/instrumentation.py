@@ -0,0 +1,216 @@
+"""Per-stage timing and memory instrumentation for the mg pipeline.
+
+Stages are wrapped in spans:
+
+    with span("merge_ab", rows_in=len(df_a) + len(df_b)) as s:
+        merged = pd.merge(...)
+        s.rows_out = len(merged)
+
+Every span records its duration, rows in/out and the process peak RSS. When
+memory tracing is on (--profile) it also records the peak traced allocation
+during the span, and with a profile directory the outermost active span is run
+under cProfile and dumped to <dir>/<NNN>-<stage>.prof.
+"""
+
+import cProfile
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+MIB = 1024 * 1024
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far in MiB, if available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return peak / MIB if sys.platform == "darwin" else peak / 1024
+
+
+class Span:
+    """Measurements of one run of a stage."""
+
+    def __init__(self, name: str, rows_in: Optional[int], parent: Optional[str]):
+        self.name = name
+        self.parent = parent
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self.started_at = time.time()
+        self.seconds: Optional[float] = None
+        self.peak_rss_mb: Optional[float] = None
+        self.peak_traced_mb: Optional[float] = None
+        self.profile_path: Optional[str] = None
+        self._peak_bytes = 0
+        self._start = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "parent": self.parent,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "peak_rss_mb": self.peak_rss_mb,
+            "peak_traced_mb": self.peak_traced_mb,
+            "profile": self.profile_path,
+        }
+
+
+class StageProfiler:
+    """Collect spans for the stages of one run."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.profile_dir: Optional[str] = None
+        self._stack: List[Span] = []
+        self._cprofile_active = False
+
+    def configure(
+        self, trace_memory: bool = False, profile_dir: Optional[str] = None
+    ) -> None:
+        """Turn on tracemalloc memory tracing and/or per-stage cProfile dumps.
+
+        tracemalloc slows allocation-heavy code down noticeably, so it is only
+        used when asked for.
+        """
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.profile_dir = profile_dir
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    @contextmanager
+    def span(self, name: str, rows_in: Optional[int] = None) -> Iterator[Span]:
+        """Measure the enclosed block as one run of stage name."""
+        parent = self._stack[-1] if self._stack else None
+        current = Span(name, rows_in, parent.name if parent else None)
+
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # tracemalloc has a single peak counter: fold the peak so far into
+            # the enclosing span before resetting it for this one
+            if parent is not None:
+                parent._peak_bytes = max(
+                    parent._peak_bytes, tracemalloc.get_traced_memory()[1]
+                )
+            tracemalloc.reset_peak()
+
+        profiler = None
+        if self.profile_dir and not self._cprofile_active:
+            profiler = cProfile.Profile()
+            self._cprofile_active = True
+            profiler.enable()
+
+        self._stack.append(current)
+        current._start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            current.seconds = time.perf_counter() - current._start
+            self._stack.pop()
+
+            if profiler is not None:
+                profiler.disable()
+                self._cprofile_active = False
+                stage = re.sub(r"\W+", "_", name)
+                current.profile_path = os.path.join(
+                    self.profile_dir, f"{len(self.spans):03d}-{stage}.prof"
+                )
+                profiler.dump_stats(current.profile_path)
+
+            if tracing and tracemalloc.is_tracing():
+                peak = max(current._peak_bytes, tracemalloc.get_traced_memory()[1])
+                current.peak_traced_mb = peak / MIB
+                if parent is not None:
+                    parent._peak_bytes = max(parent._peak_bytes, peak)
+                tracemalloc.reset_peak()
+            current.peak_rss_mb = peak_rss_mb()
+            self.spans.append(current)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Aggregate the spans per stage, in the order stages first started."""
+        stages: Dict[str, Dict[str, Any]] = {}
+        for s in sorted(self.spans, key=lambda s: s._start):
+            entry = stages.setdefault(
+                s.name,
+                {
+                    "stage": s.name,
+                    "parent": s.parent,
+                    "calls": 0,
+                    "seconds": 0.0,
+                    "rows_in": None,
+                    "rows_out": None,
+                    "peak_rss_mb": None,
+                    "peak_traced_mb": None,
+                },
+            )
+            entry["calls"] += 1
+            entry["seconds"] += s.seconds or 0.0
+            for key in ("rows_in", "rows_out"):
+                value = getattr(s, key)
+                if value is not None:
+                    entry[key] = (entry[key] or 0) + value
+            for key in ("peak_rss_mb", "peak_traced_mb"):
+                value = getattr(s, key)
+                if value is not None:
+                    entry[key] = max(entry[key] or 0.0, value)
+        return list(stages.values())
+
+    def format_summary(self) -> str:
+        """Render the per-stage summary as a text table."""
+
+        def fmt(value, spec):
+            return "-" if value is None else format(value, spec)
+
+        lines = [
+            f"{'stage':<24}{'calls':>6}{'seconds':>10}{'rows in':>12}"
+            f"{'rows out':>12}{'rss MiB':>9}{'traced MiB':>12}"
+        ]
+        for entry in self.summary():
+            label = ("  " if entry["parent"] else "") + entry["stage"]
+            lines.append(
+                f"{label:<24}{entry['calls']:>6}{entry['seconds']:>10.3f}"
+                f"{fmt(entry['rows_in'], ','):>12}{fmt(entry['rows_out'], ','):>12}"
+                f"{fmt(entry['peak_rss_mb'], '.0f'):>9}"
+                f"{fmt(entry['peak_traced_mb'], '.1f'):>12}"
+            )
+        return "\n".join(lines)
+
+    def write_trace(self, path: str) -> None:
+        """Write every span and the per-stage summary to a JSON file."""
+        with open(path, "w") as file:
+            json.dump(
+                {
+                    "spans": [s.to_dict() for s in self.spans],
+                    "summary": self.summary(),
+                },
+                file,
+                indent=2,
+            )
+
+    def reset(self) -> None:
+        """Forget the recorded spans."""
+        self.spans = []
+
+
+# Shared by file_joiner and db_loader so a pipeline run ends up in one trace
+PROFILER = StageProfiler()
+
+
+def span(name: str, rows_in: Optional[int] = None):
+    """Open a span on the shared profiler."""
+    return PROFILER.span(name, rows_in)
@@ -3,27 +3,78 @@ import re
 import os
 import tempfile
 import shutil
-import sys
+import argparse
+import io
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+
+ENRICH_COLUMNS = ["main_group", "Main_class"]
+CODE_PATTERN = r"^(\w+)"
 
 
 def extract_code(name):
     """Extract the code from the name by finding the first word."""
-    match = re.search(r"^(\w+)", name)
+    match = re.search(CODE_PATTERN, name)
     return match.group(1) if match else ""
 
 
-def process_files(input_file, lookup_file, name_column="Name", report_column="report"):
-    # Read the lookup file into a dictionary for faster lookups
+def load_lookup(lookup_file):
+    """
+    Read the lookup file into a DataFrame indexed by codebase.
+
+    Later rows win when a codebase appears more than once, matching the
+    behaviour of the original dictionary build.
+    """
     lookup_df = pd.read_csv(lookup_file)
+    lookup_df = lookup_df.drop_duplicates(subset="codebase", keep="last")
+    lookup_df = lookup_df.dropna(subset=["codebase"])
+    return lookup_df.set_index("codebase")[ENRICH_COLUMNS].astype(object)
+
+
+def enrich_frame(df, lookup, name_column="Name", report_column="report"):
+    """
+    Add main_group/Main_class to the 'mist' rows of df using vectorized ops.
+
+    Args:
+        df (DataFrame): Input rows, modified in place and returned
+        lookup (DataFrame): Lookup table as returned by load_lookup
+        name_column (str): Column holding the name to extract the code from
+        report_column (str): Column holding the report type
+
+    Returns:
+        DataFrame: The enriched DataFrame
+    """
+    # Add new columns with empty strings as default
+    for col in ENRICH_COLUMNS:
+        df[col] = ""
+
+    # Extract the leading code for 'mist' rows only
+    mask = (df[report_column] == "mist").to_numpy()
+    if not mask.any():
+        return df
+    codes = df.loc[mask, name_column].str.extract(CODE_PATTERN, expand=False)
+
+    # Keep only the rows whose code is present in the lookup
+    codes = codes.dropna()
+    codes = codes[codes.isin(lookup.index)]
+    if codes.empty:
+        return df
+
+    matched = lookup.loc[codes.to_numpy()]
+    for col in ENRICH_COLUMNS:
+        df.loc[codes.index, col] = matched[col].to_numpy()
+
+    return df
+
+
+def _enrich_iterrows(df, lookup_df, name_column="Name", report_column="report"):
+    """Original row-by-row enrichment, kept only for comparison with enrich_frame."""
     lookup_dict = {}
 
     for _, row in lookup_df.iterrows():
         lookup_dict[row["codebase"]] = (row["main_group"], row["Main_class"])
 
-    # Read the entire file at once
-    df = pd.read_csv(input_file)
-
     # Add new columns with empty strings as default
     df["main_group"] = ""
     df["Main_class"] = ""
@@ -41,6 +92,255 @@ def process_files(input_file, lookup_file, name_column="Name", report_column="re
                 df.at[idx, "main_group"] = main_group
                 df.at[idx, "Main_class"] = main_class
 
+    return df
+
+
+def _replace_file(tmp_path, target_path):
+    """Atomically move tmp_path over target_path, keeping the target's permissions."""
+    if os.path.exists(target_path):
+        shutil.copymode(target_path, tmp_path)
+    os.replace(tmp_path, target_path)
+
+
+def _process_streaming(input_file, lookup, chunksize, name_column, report_column):
+    """
+    Enrich input_file chunk by chunk into a temp file, then rename it over the input.
+
+    Every column is read as text so values are passed through unchanged and dtype
+    inference cannot differ between chunks. Peak memory is one chunk plus the lookup.
+
+    Returns:
+        int: Number of rows written
+    """
+    input_dir = os.path.dirname(os.path.abspath(input_file))
+    fd, tmp_path = tempfile.mkstemp(suffix=".csv", dir=input_dir)
+    total_rows = 0
+
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as out:
+            reader = pd.read_csv(
+                input_file, chunksize=chunksize, dtype=str, keep_default_na=False
+            )
+            for i, chunk in enumerate(reader):
+                chunk = enrich_frame(chunk, lookup, name_column, report_column)
+                chunk.to_csv(out, index=False, header=(i == 0))
+                total_rows += len(chunk)
+        _replace_file(tmp_path, input_file)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return total_rows
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of header + bytes [start, end) of a file, for pd.read_csv."""
+
+    def __init__(self, path, start, end, header):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+        self._header = header
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._header:
+            n = min(len(buffer), len(self._header))
+            buffer[:n] = self._header[:n]
+            self._header = self._header[n:]
+            return n
+        if self._remaining <= 0:
+            return 0
+        data = self._file.read(min(len(buffer), self._remaining))
+        self._remaining -= len(data)
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def _partition_file(input_file, n_parts):
+    """
+    Split the data rows of input_file into at most n_parts byte ranges.
+
+    Range boundaries are moved forward to the next line start, so this assumes
+    no quoted field contains a newline.
+
+    Returns:
+        tuple: (header line bytes, list of (start, end) byte offsets)
+    """
+    with open(input_file, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+
+        offsets = [data_start]
+        step = (size - data_start) / n_parts
+        for i in range(1, n_parts):
+            # Seek one byte back so a target that is already a line start is kept
+            f.seek(max(int(data_start + i * step), data_start) - 1)
+            f.readline()
+            offsets.append(min(f.tell(), size))
+        offsets.append(size)
+
+    ranges = [(a, b) for a, b in zip(offsets, offsets[1:]) if b > a]
+    return header, ranges or [(data_start, data_start)]
+
+
+# Per-process state set once by the pool initializer so the lookup is only
+# pickled once per worker rather than once per partition.
+_WORKER_STATE = {}
+
+
+def _init_worker(lookup, name_column, report_column):
+    _WORKER_STATE["lookup"] = lookup
+    _WORKER_STATE["name_column"] = name_column
+    _WORKER_STATE["report_column"] = report_column
+
+
+def _enrich_partition(input_file, header, start, end, part_path, write_header, chunksize):
+    """Enrich one byte range of input_file into part_path. Returns the row count."""
+    rows = 0
+    source = io.BufferedReader(_ByteRange(input_file, start, end, header))
+    with source, open(part_path, "w", newline="", encoding="utf-8") as out:
+        reader = pd.read_csv(
+            source, chunksize=chunksize, dtype=str, keep_default_na=False
+        )
+        chunks = reader if chunksize else [reader]
+        for i, chunk in enumerate(chunks):
+            chunk = enrich_frame(
+                chunk,
+                _WORKER_STATE["lookup"],
+                _WORKER_STATE["name_column"],
+                _WORKER_STATE["report_column"],
+            )
+            chunk.to_csv(out, index=False, header=(write_header and i == 0))
+            rows += len(chunk)
+    return rows
+
+
+def _process_parallel(
+    input_file, lookup, workers, chunksize, name_column, report_column
+):
+    """
+    Enrich byte-range partitions of input_file in a process pool.
+
+    Each worker writes its partition to a part file; the parts are then
+    concatenated in input order into a temp file that replaces the input.
+    Values are read as text, as in the streaming mode.
+
+    Returns:
+        int: Number of rows written
+    """
+    header, ranges = _partition_file(input_file, workers)
+    input_dir = os.path.dirname(os.path.abspath(input_file))
+    work_dir = tempfile.mkdtemp(dir=input_dir)
+
+    try:
+        part_paths = [
+            os.path.join(work_dir, f"part-{i:05d}.csv") for i in range(len(ranges))
+        ]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(lookup, name_column, report_column),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _enrich_partition,
+                    input_file,
+                    header,
+                    start,
+                    end,
+                    part_path,
+                    i == 0,
+                    chunksize,
+                )
+                for i, ((start, end), part_path) in enumerate(zip(ranges, part_paths))
+            ]
+            total_rows = sum(future.result() for future in futures)
+
+        merged_path = os.path.join(work_dir, "merged.csv")
+        with open(merged_path, "wb") as out:
+            for part_path in part_paths:
+                with open(part_path, "rb") as part:
+                    shutil.copyfileobj(part, out)
+        _replace_file(merged_path, input_file)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return total_rows
+
+
+def process_files(
+    input_file,
+    lookup_file,
+    name_column="Name",
+    report_column="report",
+    engine="vectorized",
+    chunksize=None,
+    workers=None,
+):
+    """
+    Enrich 'mist' rows of input_file with main_group/Main_class from lookup_file.
+
+    Args:
+        input_file (str): Path to the CSV file to update in place
+        lookup_file (str): Path to the lookup CSV (codebase, main_group, Main_class)
+        name_column (str): Column holding the name to extract the code from
+        report_column (str): Column holding the report type
+        engine (str): "vectorized" (default) or "iterrows" for the original loop
+        chunksize (int, optional): Stream the input in chunks of this many rows
+            instead of loading it whole. Only supported by the vectorized engine.
+        workers (int, optional): Split the input into line-aligned byte ranges and
+            enrich them in this many processes. Only supported by the vectorized
+            engine; combines with chunksize to bound memory per worker.
+    """
+    if engine not in ("vectorized", "iterrows"):
+        raise ValueError(f"Unknown engine '{engine}'")
+    if (chunksize is not None or workers is not None) and engine != "vectorized":
+        raise ValueError(
+            "chunksize and workers are only supported by the vectorized engine"
+        )
+
+    if workers is not None and workers > 1:
+        rows = _process_parallel(
+            input_file,
+            load_lookup(lookup_file),
+            workers,
+            chunksize,
+            name_column,
+            report_column,
+        )
+        print(
+            f"File {input_file} has been successfully updated with the lookup data "
+            f"({rows} rows across {workers} workers)."
+        )
+        return
+
+    if chunksize is not None:
+        rows = _process_streaming(
+            input_file, load_lookup(lookup_file), chunksize, name_column, report_column
+        )
+        print(
+            f"File {input_file} has been successfully updated with the lookup data "
+            f"({rows} rows streamed in chunks of {chunksize})."
+        )
+        return
+
+    # Read the entire file at once
+    df = pd.read_csv(input_file)
+
+    if engine == "iterrows":
+        df = _enrich_iterrows(df, pd.read_csv(lookup_file), name_column, report_column)
+    else:
+        df = enrich_frame(df, load_lookup(lookup_file), name_column, report_column)
+
     # Write the updated dataframe back to the file
     df.to_csv(input_file, index=False)
 
@@ -48,17 +348,39 @@ def process_files(input_file, lookup_file, name_column="Name", report_column="re
 
 
 if __name__ == "__main__":
-    # Default file paths
-    input_file = "large_file.csv"
-    lookup_file = "lookup_file.csv"
-
-    # Check for command-line arguments
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-    if len(sys.argv) > 2:
-        lookup_file = sys.argv[2]
-
-    # You can specify different column names if needed
-    # process_files(input_file, lookup_file, name_column="CustomNameColumn", report_column="CustomReportColumn")
+    parser = argparse.ArgumentParser(
+        description="Enrich 'mist' rows of a CSV file from a lookup file"
+    )
+    parser.add_argument("input_file", nargs="?", default="large_file.csv")
+    parser.add_argument("lookup_file", nargs="?", default="lookup_file.csv")
+    parser.add_argument("--name-column", default="Name")
+    parser.add_argument("--report-column", default="report")
+    parser.add_argument(
+        "--engine",
+        choices=["vectorized", "iterrows"],
+        default="vectorized",
+        help="Enrichment implementation (iterrows is the original loop, for comparison)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream the input in chunks of N rows to keep memory bounded",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Enrich line-aligned partitions of the input in N processes",
+    )
+    args = parser.parse_args()
 
-    process_files(input_file, lookup_file)
+    process_files(
+        args.input_file,
+        args.lookup_file,
+        name_column=args.name_column,
+        report_column=args.report_column,
+        engine=args.engine,
+        chunksize=args.chunksize,
+        workers=args.workers,
+    )
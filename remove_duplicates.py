@@ -1,10 +1,572 @@
 import pandas as pd
-import sys
+import numpy as np
 import os
+import math
+import json
+import sqlite3
+import shutil
 import tempfile
+import argparse
+from contextlib import contextmanager
 
 
-def remove_duplicates(input_file, output_file=None, columns=None):
+# Rough in-memory size of a parsed pandas row relative to its size on disk
+PANDAS_OVERHEAD_FACTOR = 10
+DEFAULT_MEMORY_LIMIT_MB = 512
+MAX_PARTITIONS = 4096
+ROW_NUMBER_COLUMN = "__row_number__"
+
+
+def _read_header(input_file):
+    """Return the column names of a CSV file without reading its rows."""
+    return pd.read_csv(input_file, nrows=0).columns.tolist()
+
+
+def _resolve_columns(all_columns, columns):
+    """Default to all columns and validate that the requested ones exist."""
+    if columns is None:
+        return list(all_columns)
+    for col in columns:
+        if col not in all_columns:
+            raise ValueError(f"Column '{col}' not found in the input file")
+    return columns
+
+
+def _estimate_row_bytes(input_file, sample_bytes=1 << 20):
+    """Estimate the average size of a row on disk from the start of the file."""
+    with open(input_file, "rb") as f:
+        f.readline()
+        sample = f.read(sample_bytes)
+    lines = sample.count(b"\n")
+    return max(1, len(sample) // lines) if lines else max(1, len(sample))
+
+
+def _chunksize_for_budget(input_file, memory_limit_mb):
+    """Number of rows per chunk that keeps a parsed chunk within the memory budget."""
+    budget = memory_limit_mb * 1024 * 1024
+    row_bytes = _estimate_row_bytes(input_file) * PANDAS_OVERHEAD_FACTOR
+    return max(1000, budget // row_bytes)
+
+
+def _read_chunks(input_file, chunksize, usecols=None):
+    """Read a CSV in chunks with every value kept as its original text."""
+    return pd.read_csv(
+        input_file,
+        chunksize=chunksize,
+        usecols=usecols,
+        dtype=str,
+        keep_default_na=False,
+    )
+
+
+@contextmanager
+def _atomic_output(output_file):
+    """
+    Yield a handle to a temp file next to output_file that replaces it on success.
+
+    This makes it safe to stream the result back over the input file.
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    fd, tmp_path = tempfile.mkstemp(suffix=".csv", dir=output_dir)
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as out:
+            yield out
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class _FingerprintSet:
+    """
+    Compact set of key fingerprints backed by sorted NumPy arrays.
+
+    Fingerprints are kept in a few sorted runs whose sizes shrink geometrically,
+    so inserts are amortized O(log n) merges and membership is a binary search
+    per run. Memory is 8 bytes per distinct key.
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    def contains(self, hashes):
+        """Return a boolean mask of which hashes are already in the set."""
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.searchsorted(run, hashes)
+            pos[pos == len(run)] = 0
+            found |= run[pos] == hashes
+        return found
+
+    def add(self, hashes):
+        """Add hashes that are known to be distinct and not yet in the set."""
+        if len(hashes) == 0:
+            return
+        run = np.sort(hashes)
+        while self._runs and len(self._runs[-1]) <= len(run):
+            run = np.sort(np.concatenate([self._runs.pop(), run]), kind="mergesort")
+        self._runs.append(run)
+
+
+def _set_bits(bitmap, positions):
+    """Set the bits at positions in a packed (big-endian, as np.packbits) bitmap."""
+    np.bitwise_or.at(
+        bitmap, positions >> 3, np.left_shift(1, 7 - (positions & 7)).astype(np.uint8)
+    )
+
+
+def _bit_range(bitmap, start, length):
+    """Unpack bits [start, start + length) of a packed bitmap into a boolean mask."""
+    first_byte = start >> 3
+    last_byte = (start + length + 7) >> 3
+    bits = np.unpackbits(bitmap[first_byte:last_byte])
+    skip = start & 7
+    return bits[skip : skip + length].astype(bool)
+
+
+def _hash_keys(chunk, columns):
+    """64-bit fingerprint of the key columns of every row in chunk."""
+    return pd.util.hash_pandas_object(chunk[columns], index=False).to_numpy()
+
+
+def _first_unseen(hashes, seen):
+    """Mask of rows whose fingerprint is neither in seen nor earlier in this chunk."""
+    mask = np.zeros(len(hashes), dtype=bool)
+    _, first_idx = np.unique(hashes, return_index=True)
+    mask[first_idx] = True
+    mask[mask] = ~seen.contains(hashes[mask])
+    return mask
+
+
+def _dedup_in_memory(input_file, output_file, columns):
+    """Load the whole file and drop duplicates with pandas."""
+    # Read the entire file into memory
+    df = pd.read_csv(input_file)
+
+    # Store original count
+    original_count = len(df)
+    print(f"Original record count: {original_count}")
+
+    columns = _resolve_columns(df.columns, columns)
+    print(f"Checking for duplicates based on columns: {columns}")
+
+    # Identify duplicates
+    # keep='first' means we keep the first occurrence and mark all subsequent ones as duplicates
+    duplicates = df.duplicated(subset=columns, keep="first")
+    duplicate_count = int(duplicates.sum())
+
+    # Remove duplicates and write the unique records to the output file
+    df[~duplicates].to_csv(output_file, index=False)
+
+    return original_count, duplicate_count
+
+
+def _dedup_partitioned(input_file, output_file, columns, memory_limit_mb, temp_dir):
+    """
+    Out-of-core deduplication by hash partitioning on the key columns.
+
+    1. Stream the input and spill (key columns, row number) to one of N
+       partition files chosen by the hash of the key. Equal keys always land
+       in the same partition, and each partition is small enough for memory.
+    2. Deduplicate each partition with keep="first" on row order and record the
+       surviving row numbers in a bitmap over the whole file (one bit per row).
+    3. Stream the input again and write only the surviving rows, which keeps
+       the original row order.
+
+    Keys are compared as the text stored in the file.
+    """
+    columns = _resolve_columns(_read_header(input_file), columns)
+    print(f"Checking for duplicates based on columns: {columns}")
+
+    budget = memory_limit_mb * 1024 * 1024
+    file_size = os.path.getsize(input_file)
+    n_partitions = min(
+        MAX_PARTITIONS, max(1, math.ceil(file_size * PANDAS_OVERHEAD_FACTOR / budget))
+    )
+    chunksize = _chunksize_for_budget(input_file, memory_limit_mb)
+    print(f"Using {n_partitions} partitions and chunks of {chunksize} rows")
+
+    spill_dir = tempfile.mkdtemp(prefix="dedup_", dir=temp_dir)
+    try:
+        partition_paths = [
+            os.path.join(spill_dir, f"partition-{i:05d}.csv")
+            for i in range(n_partitions)
+        ]
+
+        # Pass 1: spill keys and row numbers to hash partitions
+        original_count = 0
+        for chunk in _read_chunks(input_file, chunksize, usecols=columns):
+            row_numbers = np.arange(
+                original_count, original_count + len(chunk), dtype=np.int64
+            )
+            keys = chunk[columns].assign(**{ROW_NUMBER_COLUMN: row_numbers})
+            original_count += len(chunk)
+
+            hashes = pd.util.hash_pandas_object(chunk[columns], index=False)
+            partition_ids = (hashes.to_numpy() % np.uint64(n_partitions)).astype(
+                np.int64
+            )
+            for partition_id, part in keys.groupby(partition_ids, sort=False):
+                path = partition_paths[partition_id]
+                part.to_csv(
+                    path, mode="a", index=False, header=not os.path.exists(path)
+                )
+
+        print(f"Original record count: {original_count}")
+
+        # Pass 2: deduplicate each partition independently
+        keep_bits = np.zeros((original_count + 7) // 8, dtype=np.uint8)
+        for path in partition_paths:
+            if not os.path.exists(path):
+                continue
+            part = pd.read_csv(
+                path, dtype=str, keep_default_na=False
+            ).astype({ROW_NUMBER_COLUMN: np.int64})
+            first = ~part.duplicated(subset=columns, keep="first")
+            _set_bits(keep_bits, part.loc[first, ROW_NUMBER_COLUMN].to_numpy())
+            del part
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    # Pass 3: write surviving rows in their original order
+    offset = 0
+    kept_count = 0
+    with _atomic_output(output_file) as out:
+        for i, chunk in enumerate(_read_chunks(input_file, chunksize)):
+            chunk_mask = _bit_range(keep_bits, offset, len(chunk))
+            offset += len(chunk)
+            kept_count += int(chunk_mask.sum())
+            chunk[chunk_mask].to_csv(out, index=False, header=(i == 0))
+        if out.tell() == 0:
+            pd.DataFrame(columns=_read_header(input_file)).to_csv(out, index=False)
+
+    duplicate_count = original_count - kept_count
+    return original_count, duplicate_count
+
+
+def _open_verify_index(spill_dir, columns):
+    """
+    Create the SQLite table of exact keys used by verify in spill_dir.
+
+    It is a scratch file, so it is written without a journal or fsyncs.
+    """
+    conn = sqlite3.connect(os.path.join(spill_dir, "verify.sqlite"))
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    keys = ", ".join(f"k{i} TEXT" for i in range(len(columns)))
+    key_names = ", ".join(f"k{i}" for i in range(len(columns)))
+    conn.execute(
+        f"CREATE TABLE seen_keys (fingerprint INTEGER, {keys}, "
+        f"PRIMARY KEY (fingerprint, {key_names})) WITHOUT ROWID"
+    )
+    conn.execute(
+        f"CREATE TEMP TABLE chunk_keys (position INTEGER PRIMARY KEY, "
+        f"fingerprint INTEGER, {keys})"
+    )
+    return conn
+
+
+def _register_exact_keys(conn, hashes, keys):
+    """
+    Record exact keys in the verify index and return the mask of rows to keep.
+
+    keys holds the key columns of the rows whose fingerprints are in hashes. A
+    row is kept if its key values are neither in the index nor earlier in keys.
+    """
+    keep = ~keys.duplicated().to_numpy()
+    n_keys = keys.shape[1]
+    conn.execute("DELETE FROM temp.chunk_keys")
+    conn.executemany(
+        f"INSERT INTO temp.chunk_keys VALUES (?, ?{', ?' * n_keys})",
+        zip(
+            np.flatnonzero(keep).tolist(),
+            # SQLite integers are signed, so store the uint64 bit pattern as int64
+            hashes[keep].view(np.int64).tolist(),
+            *(keys.iloc[keep, i].tolist() for i in range(n_keys)),
+        ),
+    )
+    matches = " AND ".join(
+        ["s.fingerprint = c.fingerprint"] + [f"s.k{i} = c.k{i}" for i in range(n_keys)]
+    )
+    known = np.fromiter(
+        (
+            r[0]
+            for r in conn.execute(
+                f"SELECT c.position FROM temp.chunk_keys c JOIN seen_keys s ON {matches}"
+            )
+        ),
+        dtype=np.int64,
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO seen_keys "
+        f"SELECT fingerprint{''.join(f', k{i}' for i in range(n_keys))} "
+        "FROM temp.chunk_keys"
+    )
+
+    keep[known] = False
+    return keep
+
+
+def _dedup_streaming(
+    input_file, output_file, columns, memory_limit_mb, verify, temp_dir=None
+):
+    """
+    Single-pass deduplication keeping only a fingerprint per distinct key.
+
+    Each chunk's key columns are hashed to 64-bit fingerprints; a row is written
+    immediately unless its fingerprint has been seen before. Memory is one chunk
+    plus 8 bytes per distinct key.
+
+    With verify=True a first pass finds the fingerprints that repeat, and a
+    second pass compares the rows carrying them on their actual key values,
+    kept in a SQLite table spilled to temp_dir, so a fingerprint collision can
+    never drop a distinct row. Only the rows with a repeated fingerprint are
+    stored there.
+
+    Keys are compared as the text stored in the file.
+    """
+    columns = _resolve_columns(_read_header(input_file), columns)
+    print(f"Checking for duplicates based on columns: {columns}")
+    chunksize = _chunksize_for_budget(input_file, memory_limit_mb)
+
+    original_count = 0
+    kept_count = 0
+
+    if not verify:
+        seen = _FingerprintSet()
+        with _atomic_output(output_file) as out:
+            for i, chunk in enumerate(_read_chunks(input_file, chunksize)):
+                original_count += len(chunk)
+                hashes = _hash_keys(chunk, columns)
+                keep = _first_unseen(hashes, seen)
+                seen.add(hashes[keep])
+                chunk[keep].to_csv(out, index=False, header=(i == 0))
+                kept_count += int(keep.sum())
+            if out.tell() == 0:
+                pd.DataFrame(columns=_read_header(input_file)).to_csv(out, index=False)
+    else:
+        # Pass 1: find fingerprints that occur more than once
+        seen = _FingerprintSet()
+        repeated = _FingerprintSet()
+        for chunk in _read_chunks(input_file, chunksize, usecols=columns):
+            hashes = _hash_keys(chunk, columns)
+            first = _first_unseen(hashes, seen)
+            seen.add(hashes[first])
+            repeated_hashes = np.unique(hashes[~first])
+            repeated.add(repeated_hashes[~repeated.contains(repeated_hashes)])
+        del seen
+        print(f"Verifying {len(repeated)} repeated fingerprints against the keys")
+
+        # Pass 2: rows with a unique fingerprint are kept as-is; the others are
+        # compared on their exact key values
+        spill_dir = tempfile.mkdtemp(prefix="dedup_", dir=temp_dir)
+        conn = _open_verify_index(spill_dir, columns)
+        try:
+            with _atomic_output(output_file) as out:
+                for i, chunk in enumerate(_read_chunks(input_file, chunksize)):
+                    original_count += len(chunk)
+                    keep = np.ones(len(chunk), dtype=bool)
+                    hashes = _hash_keys(chunk, columns)
+                    candidates = np.flatnonzero(repeated.contains(hashes))
+                    keep[candidates] = _register_exact_keys(
+                        conn, hashes[candidates], chunk.iloc[candidates][columns]
+                    )
+                    chunk[keep].to_csv(out, index=False, header=(i == 0))
+                    kept_count += int(keep.sum())
+                if out.tell() == 0:
+                    pd.DataFrame(columns=_read_header(input_file)).to_csv(
+                        out, index=False
+                    )
+        finally:
+            conn.close()
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+    print(f"Original record count: {original_count}")
+    return original_count, original_count - kept_count
+
+
+def _open_key_index(index_path, columns):
+    """
+    Open (or create) the SQLite index of key fingerprints seen by earlier runs.
+
+    The key columns are stored with the index so a run with different columns
+    cannot silently reuse fingerprints computed from other keys.
+    """
+    conn = sqlite3.connect(index_path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS seen_keys "
+        "(fingerprint INTEGER PRIMARY KEY) WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS index_meta (name TEXT PRIMARY KEY, value TEXT)"
+    )
+    conn.execute("CREATE TEMP TABLE chunk_keys (fingerprint INTEGER PRIMARY KEY)")
+
+    row = conn.execute("SELECT value FROM index_meta WHERE name = 'columns'").fetchone()
+    if row is None:
+        conn.execute(
+            "INSERT INTO index_meta (name, value) VALUES ('columns', ?)",
+            (json.dumps(columns),),
+        )
+    elif json.loads(row[0]) != columns:
+        conn.close()
+        raise ValueError(
+            f"Key index {index_path} was built for columns {json.loads(row[0])}, "
+            f"not {columns}"
+        )
+    return conn
+
+
+def _register_keys(conn, hashes):
+    """
+    Record fingerprints in the key index and return the mask of rows to keep.
+
+    A row is kept if its fingerprint is neither in the index nor earlier in
+    this chunk. Changes become permanent when the caller commits.
+    """
+    keep = _first_unseen(hashes, _FingerprintSet())
+    # SQLite integers are signed, so store the uint64 bit pattern as int64
+    fingerprints = hashes[keep].view(np.int64)
+
+    conn.execute("DELETE FROM temp.chunk_keys")
+    conn.executemany(
+        "INSERT INTO temp.chunk_keys (fingerprint) VALUES (?)",
+        zip(fingerprints.tolist()),
+    )
+    known = np.fromiter(
+        (
+            r[0]
+            for r in conn.execute(
+                "SELECT c.fingerprint FROM temp.chunk_keys c "
+                "JOIN seen_keys s ON s.fingerprint = c.fingerprint"
+            )
+        ),
+        dtype=np.int64,
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO seen_keys (fingerprint) "
+        "SELECT fingerprint FROM temp.chunk_keys"
+    )
+
+    keep[keep] = ~np.isin(fingerprints, known)
+    return keep
+
+
+def _undo_interrupted_append(conn, output_file):
+    """
+    Cut output_file back to where an unfinished run started appending.
+
+    A run records the output size in the key index before appending and clears
+    it in the same commit as the new keys, so a leftover offset means the rows
+    after it were written but their keys never committed.
+    """
+    row = conn.execute(
+        "SELECT value FROM index_meta WHERE name = 'append_offset'"
+    ).fetchone()
+    if row is None:
+        return
+    offset = int(row[0])
+    if os.path.exists(output_file) and os.path.getsize(output_file) > offset:
+        print(f"Removing rows an interrupted run appended to {output_file}")
+        if offset == 0:
+            os.remove(output_file)
+        else:
+            with open(output_file, "r+b") as f:
+                f.truncate(offset)
+    conn.execute("DELETE FROM index_meta WHERE name = 'append_offset'")
+    conn.commit()
+
+
+def _dedup_incremental(input_file, output_file, columns, memory_limit_mb, key_index):
+    """
+    Append the rows of a delta file whose keys no earlier run has written.
+
+    Key fingerprints are persisted in a SQLite index next to the output, so
+    each run reads only the delta and its cost scales with the delta size.
+    If the output exists but the index does not, the index is seeded once
+    from the existing output. A run that fails or is killed part-way has its
+    appended rows removed (at once, or at the start of the next run), so a
+    retry cannot write them twice.
+
+    Keys are compared as the text stored in the file.
+    """
+    if os.path.abspath(input_file) == os.path.abspath(output_file):
+        raise ValueError("Incremental mode needs an output file distinct from the input")
+
+    header = _read_header(input_file)
+    columns = _resolve_columns(header, columns)
+    print(f"Checking for duplicates based on columns: {columns}")
+
+    output_exists = os.path.exists(output_file) and os.path.getsize(output_file) > 0
+    if output_exists and _read_header(output_file) != header:
+        raise ValueError(
+            f"Columns of {input_file} do not match the existing output {output_file}"
+        )
+
+    if key_index is None:
+        key_index = output_file + ".keys.sqlite"
+    index_exists = os.path.exists(key_index)
+    chunksize = _chunksize_for_budget(input_file, memory_limit_mb)
+
+    conn = _open_key_index(key_index, columns)
+    try:
+        _undo_interrupted_append(conn, output_file)
+        output_exists = os.path.exists(output_file) and os.path.getsize(output_file) > 0
+
+        if output_exists and not index_exists:
+            print(f"Seeding key index {key_index} from {output_file}")
+            for chunk in _read_chunks(output_file, chunksize, usecols=columns):
+                _register_keys(conn, _hash_keys(chunk, columns))
+
+        # Remember where this run starts appending until its keys are committed
+        conn.execute(
+            "INSERT OR REPLACE INTO index_meta (name, value) "
+            "VALUES ('append_offset', ?)",
+            (str(os.path.getsize(output_file) if output_exists else 0),),
+        )
+        conn.commit()
+
+        original_count = 0
+        kept_count = 0
+        with open(output_file, "a", newline="", encoding="utf-8") as out:
+            for i, chunk in enumerate(_read_chunks(input_file, chunksize)):
+                original_count += len(chunk)
+                keep = _register_keys(conn, _hash_keys(chunk, columns))
+                chunk[keep].to_csv(
+                    out, index=False, header=(not output_exists and i == 0)
+                )
+                kept_count += int(keep.sum())
+            if out.tell() == 0:
+                pd.DataFrame(columns=header).to_csv(out, index=False)
+
+        # Only remember the new keys once their rows are safely written
+        conn.execute("DELETE FROM index_meta WHERE name = 'append_offset'")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        _undo_interrupted_append(conn, output_file)
+        raise
+    finally:
+        conn.close()
+
+    print(f"Original record count: {original_count}")
+    return original_count, original_count - kept_count
+
+
+def remove_duplicates(
+    input_file,
+    output_file=None,
+    columns=None,
+    method="memory",
+    memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+    temp_dir=None,
+    verify=False,
+    key_index=None,
+):
     """
     Remove duplicate records from a CSV file.
 
@@ -12,6 +574,17 @@ def remove_duplicates(input_file, output_file=None, columns=None):
         input_file (str): Path to the input CSV file
         output_file (str, optional): Path to save the output file. If None, overwrites the input file.
         columns (list, optional): List of column names to consider for duplicates. If None, uses all columns.
+        method (str, optional): "memory" loads the whole file (default). "partitioned"
+            hash-partitions the keys to disk and works on files larger than RAM.
+            "streaming" makes one pass keeping only a 64-bit fingerprint per key.
+            "incremental" treats input_file as a delta and appends its unseen rows
+            to output_file, remembering keys across runs in a key index.
+        memory_limit_mb (int, optional): Memory budget for the out-of-core methods.
+        temp_dir (str, optional): Directory for spill files. Defaults to the system temp dir.
+        verify (bool, optional): For "streaming", compare the rows whose fingerprints
+            repeat on their actual key values, so a hash collision cannot drop rows.
+        key_index (str, optional): For "incremental", the SQLite file holding the keys
+            seen by earlier runs. Defaults to "<output_file>.keys.sqlite".
 
     Returns:
         int: Number of duplicate records removed
@@ -23,35 +596,27 @@ def remove_duplicates(input_file, output_file=None, columns=None):
     print(f"Processing file: {input_file}")
 
     try:
-        # Read the entire file into memory
-        # For very large files, we'd need a different approach
-        df = pd.read_csv(input_file)
-
-        # Store original count
-        original_count = len(df)
-        print(f"Original record count: {original_count}")
-
-        # Use all columns if not specified
-        if columns is None:
-            columns = df.columns.tolist()
+        if method == "memory":
+            original_count, duplicate_count = _dedup_in_memory(
+                input_file, output_file, columns
+            )
+        elif method == "partitioned":
+            original_count, duplicate_count = _dedup_partitioned(
+                input_file, output_file, columns, memory_limit_mb, temp_dir
+            )
+        elif method == "streaming":
+            original_count, duplicate_count = _dedup_streaming(
+                input_file, output_file, columns, memory_limit_mb, verify, temp_dir
+            )
+        elif method == "incremental":
+            original_count, duplicate_count = _dedup_incremental(
+                input_file, output_file, columns, memory_limit_mb, key_index
+            )
         else:
-            # Validate that specified columns exist
-            for col in columns:
-                if col not in df.columns:
-                    raise ValueError(f"Column '{col}' not found in the input file")
-
-        print(f"Checking for duplicates based on columns: {columns}")
-
-        # Identify duplicates
-        # keep='first' means we keep the first occurrence and mark all subsequent ones as duplicates
-        duplicates = df.duplicated(subset=columns, keep="first")
-        duplicate_count = duplicates.sum()
-
-        # Remove duplicates
-        df_unique = df.drop_duplicates(subset=columns, keep="first")
+            raise ValueError(f"Unknown method '{method}'")
 
         # Calculate statistics
-        remaining_count = len(df_unique)
+        remaining_count = original_count - duplicate_count
         dup_percentage = (
             (duplicate_count / original_count * 100) if original_count > 0 else 0
         )
@@ -60,9 +625,6 @@ def remove_duplicates(input_file, output_file=None, columns=None):
         print(f"Unique records: {remaining_count}")
         print(f"Duplicates removed: {duplicate_count} ({dup_percentage:.2f}%)")
 
-        # Write the unique records to the output file
-        df_unique.to_csv(output_file, index=False)
-
         return duplicate_count
 
     except Exception as e:
@@ -72,23 +634,53 @@ def remove_duplicates(input_file, output_file=None, columns=None):
 
 if __name__ == "__main__":
     # Parse command-line arguments
-    if len(sys.argv) < 2:
-        print(
-            "Usage: python remove_duplicates.py input_file.csv [output_file.csv] [column1,column2,...]"
-        )
-        sys.exit(1)
-
-    input_file = sys.argv[1]
-
+    parser = argparse.ArgumentParser(
+        usage="python remove_duplicates.py input_file.csv [output_file.csv] [column1,column2,...]"
+    )
+    parser.add_argument("input_file")
     # Optional output file path
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-
+    parser.add_argument("output_file", nargs="?", default=None)
     # Optional columns for duplicate checking
-    columns = None
-    if len(sys.argv) > 3:
-        columns = sys.argv[3].split(",")
+    parser.add_argument("columns", nargs="?", default=None)
+    parser.add_argument(
+        "--method",
+        choices=["memory", "partitioned", "streaming", "incremental"],
+        default="memory",
+        help="Deduplication strategy (partitioned works on files larger than RAM, "
+        "streaming keeps only a fingerprint per distinct key, incremental appends "
+        "a delta file to the output using keys persisted across runs)",
+    )
+    parser.add_argument(
+        "--key-index",
+        default=None,
+        help="With --method incremental, path of the persisted key index",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="With --method streaming, check repeated fingerprints on the exact keys",
+    )
+    parser.add_argument(
+        "--memory-limit-mb",
+        type=int,
+        default=DEFAULT_MEMORY_LIMIT_MB,
+        help="Memory budget for the out-of-core methods",
+    )
+    parser.add_argument("--temp-dir", default=None, help="Directory for spill files")
+    args = parser.parse_args()
+
+    columns = args.columns.split(",") if args.columns else None
 
     # Run the deduplication
-    duplicates_removed = remove_duplicates(input_file, output_file, columns)
+    duplicates_removed = remove_duplicates(
+        args.input_file,
+        args.output_file,
+        columns,
+        method=args.method,
+        memory_limit_mb=args.memory_limit_mb,
+        temp_dir=args.temp_dir,
+        verify=args.verify,
+        key_index=args.key_index,
+    )
 
     print(f"\nSuccessfully removed {duplicates_removed} duplicate records.")